@@ -6,6 +6,7 @@ import pandas as pd
 import json
 import os
 import sys
+import time
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Screener.in Data Pipeline", layout="wide", page_icon=":chart_with_upwards_trend:")
@@ -23,8 +24,10 @@ def load_path_config():
     # Default fallback guesses
     return {
         "html_dir": r"\screenerscraper\screenerscraper\screenerhtml",
+        "excel_dir": r"\screenerscraper\screenerscraper\screenerexcel",
         "metrics_json": r"\screenerscraper\screenerscraper\metrics.json",
         "sectors_json": r"\screenerscraper\screenerscraper\sectors.json",
+        "database": r"\screenerscraper\screenerscraper\screener.db",
         "backend_dir": r"\screenerscraper\screenerscraper"
     }
 
@@ -37,14 +40,18 @@ with st.sidebar:
     
     backend_dir = st.text_input("Backend Scripts Folder", paths.get("backend_dir", ""))
     html_dir = st.text_input("HTML Pages Folder", paths.get("html_dir", ""))
+    excel_dir = st.text_input("Excel Exports Folder", paths.get("excel_dir", ""))
     metrics_json_path = st.text_input("Metrics JSON File", paths.get("metrics_json", ""))
     sectors_json_path = st.text_input("Sectors JSON File", paths.get("sectors_json", ""))
+    db_path = st.text_input("Company Database File", paths.get("database", ""))
     
     if st.button(":floppy_disk: Save & Reload Paths", type="primary", use_container_width=True):
         new_paths = {
             "html_dir": html_dir.strip('\"\''),
+            "excel_dir": excel_dir.strip('\"\''),
             "metrics_json": metrics_json_path.strip('\"\''),
             "sectors_json": sectors_json_path.strip('\"\''),
+            "database": db_path.strip('\"\''),
             "backend_dir": backend_dir.strip('\"\'')
         }
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
@@ -60,9 +67,11 @@ if os.path.exists(backend_dir):
         sys.path.insert(0, backend_dir)
     try:
         # Now it imports directly from the folder you specified, no guessing.
-        from screenerscraper_getmetrics import generate_metrics_json
-        from screenerscraper_getsectors import generate_sectors_json
-        from screenerscraper import run_parser, run_shareholding_parser
+        from screenerscraper_getmeta import generate_meta_jsons
+        from screenerscraper import run_export, FinancialSink, ColumnarSink, ShareholdingSink
+        from screenerscraper_backend import available_backends, get_backend, set_backend, set_targeted
+        from screenerscraper_http import load_metrics_snapshot
+        from screenerscraper_db import DatabaseSink, CompanyDB
         backend_loaded = True
     except ImportError as e:
         st.sidebar.error(f"Import Error: {e}. Check the Backend Scripts Folder path.")
@@ -109,57 +118,83 @@ with tab1:
         
         st.markdown("**Phase 1: Meta Configuration**")
         if st.button("Generate Meta JSONs", use_container_width=True):
+            set_backend(st.session_state.get("backend", get_backend()))
+            set_targeted(st.session_state.get("targeted", True))
             with st.spinner(f"Scanning HTML files in {html_dir}..."):
-                res1, msg1 = generate_metrics_json(html_dir, metrics_json_path)
-                res2, msg2 = generate_sectors_json(html_dir, sectors_json_path)
-                if res1 and res2:
-                    st.success("JSONs successfully built! Check the config tab.")
+                workers = st.session_state.get("workers", os.cpu_count() or 1)
+                res, msg = generate_meta_jsons(html_dir, metrics_json_path, sectors_json_path, workers)
+                if res:
+                    st.success(f"{msg} Check the config tab.")
                 else:
-                    st.error(f"{msg1} | {msg2}")
+                    st.error(msg)
 
         st.divider()
 
         st.markdown("**Phase 2: Database Export**")
-        if st.button("Export Screened Companies to CSV", type="primary", use_container_width=True):
+        st.radio("Data Source", ["HTML Pages", "Excel Exports"], horizontal=True, key="source",
+                 help="Excel exports are read from the Excel Exports Folder; they have no sector data, so every company is exported.")
+        st.radio("Financial Output Format", ["CSV", "Parquet", "Arrow IPC"], horizontal=True, key="out_format")
+        st.checkbox("Load into Data Playground database", value=True, key="load_db",
+                    help="Stores every section and period of the exported companies, not just the active metrics.")
+        if st.button("Export Screened Companies", type="primary", use_container_width=True):
             
             df_sec = load_json_df(sectors_json_path, ["Broad Sector", "Sector", "Broad Industry", "Industry", "Active"])
             df_met = load_json_df(metrics_json_path, ["Section", "Metric", "Source", "Active"])
             
-            active_sectors = df_sec[df_sec['Active'] == True]['Industry'].tolist() if not df_sec.empty else []
+            active_sectors = set(df_sec[df_sec['Active'] == True]['Industry']) if not df_sec.empty else set()
             active_metrics = df_met[df_met['Active'] == True].to_dict('records') if not df_met.empty else []
 
             active_years = [y for y in range(2013, 2027) if st.session_state.get(f"yr_{y}", False)]
             active_qtrs = [q for q, key in zip(["Mar", "Jun", "Sep", "Dec"], ["q_mar", "q_jun", "q_sep", "q_dec"]) if st.session_state.get(key, True)]
             inc_ttm = st.session_state.get("inc_ttm", True)
+            workers = st.session_state.get("workers", os.cpu_count() or 1)
+            set_backend(st.session_state.get("backend", get_backend()))
+            set_targeted(st.session_state.get("targeted", True))
+            out_format = st.session_state.get("out_format", "CSV")
+            from_excel = st.session_state.get("source") == "Excel Exports"
 
             if not active_metrics:
                 st.error("No active metrics found. Please configure JSONs first.")
             else:
                 st.info("Pipeline Initialized. Locking UI during extraction...")
                 
-                st.markdown("##### :gear: Financial Data Extraction")
-                fin_status = st.empty()
-                fin_progress = st.progress(0)
+                st.markdown("##### :gear: Financial & Shareholding Extraction")
+                export_status = st.empty()
+                export_progress = st.progress(0)
                 
-                run_parser(html_dir, active_years, active_qtrs, inc_ttm, active_metrics, active_sectors, fin_progress, fin_status)
-                fin_status.success("Financial CSV Built Successfully!")
-
-                st.markdown("##### :busts_in_silhouette: Shareholding Extraction")
-                shp_status = st.empty()
-                shp_progress = st.progress(0)
-                
-                run_shareholding_parser(html_dir, active_years, active_qtrs, active_sectors, shp_progress, shp_status)
-                shp_status.success("Shareholding CSV Built Successfully!")
+                # Each page is parsed once and fanned out to both CSV sinks
+                fin_sink = FinancialSink(active_years, active_qtrs, inc_ttm, active_metrics) if out_format == "CSV" else \
+                    ColumnarSink(active_years, active_qtrs, inc_ttm, active_metrics, "parquet" if out_format == "Parquet" else "arrow")
+                sinks = [fin_sink, ShareholdingSink(active_years, active_qtrs)]
+                if st.session_state.get("load_db", True) and db_path: sinks.append(DatabaseSink(db_path))
+                if from_excel: run_export(excel_dir, sinks, active_sectors, export_progress, export_status, workers, source="xlsx")
+                else: run_export(html_dir, sinks, active_sectors, export_progress, export_status, workers)
+                export_status.success(f"Financial ({out_format}) & Shareholding CSV Built Successfully!")
                 
                 st.balloons()
 
     with col2:
         st.subheader("2. System Console")
-        st.info("Execution is strictly synchronous to guarantee 100% data integrity. Paths are mapped explicitly via the sidebar.")
+        st.info("Pages are parsed across worker processes but written back strictly in file order to guarantee 100% data integrity. Paths are mapped explicitly via the sidebar.")
+
+        st.markdown("**Network Metrics**")
+        snapshot = load_metrics_snapshot()
+        if not snapshot: st.caption("No scraper runs recorded yet.")
+        else:
+            st.caption(f"Last scraper run: {snapshot['updated']}")
+            net_rows = [{"Host": host, "Requests": h["requests"], "MB": round(h["bytes"] / 1e6, 2), "Retries": h["retries"], "Errors": h["errors"],
+                         "p50 ms": h["latency_ms"]["p50"], "p95 ms": h["latency_ms"]["p95"],
+                         "Statuses": ", ".join(f"{code}: {n}" for code, n in sorted(h["statuses"].items()))}
+                        for host, h in snapshot["hosts"].items()]
+            st.dataframe(pd.DataFrame(net_rows), hide_index=True, use_container_width=True)
 
     with col3:
         st.subheader("3. Extract Periods")
         st.checkbox("Include TTM (Trailing 12 Months)", value=True, key="inc_ttm")
+        st.number_input("Parser Worker Processes", min_value=1, max_value=64, value=min(os.cpu_count() or 1, 64), key="workers")
+        backends = available_backends()
+        st.selectbox("HTML Parser Backend", backends, index=backends.index(get_backend()), key="backend")
+        st.checkbox("Targeted Parsing (data sections only)", value=True, key="targeted")
         
         y_col1, y_col2 = st.columns(2)
         with y_col1:
@@ -195,7 +230,40 @@ with tab1:
 # TAB 2: DATA PLAYGROUND
 # ==========================================
 with tab2:
-    st.info("Interactive Query Engine will connect here once database ingestion is complete.")
+    if not db_path or not os.path.exists(db_path):
+        st.info("Run Phase 2 with 'Load into Data Playground database' ticked to build the company database.")
+    else:
+        db = CompanyDB(db_path)
+        try:
+            f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+            with f_col1: section = st.selectbox("Section", db.sections())
+            with f_col2: metric = st.selectbox("Metric", db.metrics(section) if section else [])
+            periods = db.periods(section, metric) if metric else []
+            with f_col3: sel_periods = st.multiselect("Periods", periods, default=periods[:4])
+            with f_col4: sel_industries = st.multiselect("Industries", db.industries())
+
+            v_col1, v_col2, v_col3 = st.columns(3)
+            with v_col1: min_value = st.text_input("Min Value", "")
+            with v_col2: max_value = st.text_input("Max Value", "")
+            with v_col3: group_by = st.selectbox("Group By", ["Industry", "Sector", "Broad Industry", "Broad Sector"])
+
+            if metric:
+                try: bounds = [float(v) if v.strip() else None for v in (min_value, max_value)]
+                except ValueError:
+                    st.warning("Min/Max must be numbers; value filter ignored.")
+                    bounds = [None, None]
+
+                started = time.perf_counter()
+                df_q = db.query(section, metric, sel_periods, sel_industries, *bounds)
+                st.caption(f"{len(df_q)} companies in {(time.perf_counter() - started) * 1000:.1f} ms")
+                st.dataframe(df_q, hide_index=True, use_container_width=True, height=400)
+
+                if sel_periods:
+                    st.markdown(f"**{metric} ({sel_periods[0]}) by {group_by}**")
+                    df_agg = db.aggregate(section, metric, sel_periods[0], group_by.lower().replace(' ', '_'), sel_industries)
+                    st.dataframe(df_agg, hide_index=True, use_container_width=True)
+        finally:
+            db.close()
 
 # ==========================================
 # TAB 3: JSON CONFIGURATION
@@ -2,14 +2,19 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 import xlsxwriter
 
 # --- 1. FILE PATHS ---
 DS1_PATH = "\dataset1.csv"              # Market & Shareholding
 DS2_PATH = "\dataset2.csv"              # Technicals
-SCREENER_PATH = "\screenerscraped-2026-03-17_15-49.csv"  # The pipeline output
+SCREENER_PATH = "\screenerscraped-2026-03-17_15-49.csv"  # The pipeline output (.csv, .parquet or .arrow)
 OUTPUT_PATH = "master_valuation_matrix.xlsx" # NOW XLSX
 ORPHAN_PATH = "orphaned_data.csv"
+# "formulas" = row-2 templates only (drag down in Excel), "values" = also fill every row with
+# Python-computed results, "both" = per-row formulas carrying the computed results as cached values.
+# "values" / "both" are opt-in (--mode); the default keeps the original formulas-only workbook
+COMPUTE_MODE = "formulas"
 
 # --- 2. HELPER: EXCEL COLUMN LETTERS ---
 def col_letter(idx):
@@ -20,34 +25,94 @@ def col_letter(idx):
         idx = idx // 26 - 1
     return result
 
+def load_screener(path):
+    """Loads the pipeline output: the text CSV, or the typed Parquet / Arrow IPC export."""
+    if path.endswith(".parquet"): df = pd.read_parquet(path)
+    elif path.endswith(".arrow"): df = pd.read_feather(path)
+    else: return pd.read_csv(path, dtype=str)
+    # Labels arrive dictionary-encoded; the merge keys below expect plain strings
+    cat_cols = df.select_dtypes("category").columns
+    df[cat_cols] = df[cat_cols].astype(str)
+    return fold_static(df)
+
+def fold_static(df):
+    """Moves the columnar 'Static' values (Top Info / CAGR) into the first period column, where the CSV export puts them."""
+    if "Static" not in df.columns: return df
+    periods = list(df.columns[df.columns.get_loc("Metric") + 1:].drop("Static"))
+    if not periods: return df
+    df[periods[0]] = df["Static"].combine_first(df[periods[0]])
+    return df.drop(columns="Static")
+
 # --- 3. SECTOR RELEVANCE TAGGING ---
+# First matching keyword group wins: (sector keywords, (PE, PB, EV) relevance)
+RELEVANCE_RULES = [
+    (["BANK", "FINANCE", "NBFC"], ("LOW", "HIGH", "LOW")),
+    (["TELECOM", "INFRASTRUCTURE", "POWER", "OIL", "MINING", "STEEL"], ("MED", "LOW", "HIGH")),
+]
+DEFAULT_RELEVANCE = ("HIGH", "LOW", "LOW") # PE, PB, EV (Default)
+
 def get_relevance(sector):
     sector = str(sector).upper()
-    if any(bank in sector for bank in ["BANK", "FINANCE", "NBFC"]):
-        return "LOW", "HIGH", "LOW" # PE, PB, EV
-    elif any(heavy in sector for heavy in ["TELECOM", "INFRASTRUCTURE", "POWER", "OIL", "MINING", "STEEL"]):
-        return "MED", "LOW", "HIGH" # PE, PB, EV
-    else:
-        return "HIGH", "LOW", "LOW" # PE, PB, EV (Default)
-
-def main():
-    print("Loading datasets...")
-    try:
-        df1 = pd.read_csv(DS1_PATH, dtype=str)
-        df2 = pd.read_csv(DS2_PATH, dtype=str)
-        df_screen = pd.read_csv(SCREENER_PATH, dtype=str)
-    except Exception as e:
-        print(f"Error loading files: {e}")
-        return
+    for keywords, relevance in RELEVANCE_RULES:
+        if any(k in sector for k in keywords): return relevance
+    return DEFAULT_RELEVANCE
 
-    # --- 4. MERGE DATASET 1 & 2 ---
-    df_manual = pd.merge(df1, df2, on=["NSE Symbol", "BSE Code"], how="outer")
+def tag_relevance(sectors):
+    """Vectorized get_relevance: returns Relevance_PE / _PB / _EV columns for a Sector series."""
+    upper = sectors.astype(str).str.upper()
+    conditions = [upper.str.contains("|".join(keywords), regex=True) for keywords, _ in RELEVANCE_RULES]
+    return pd.DataFrame({
+        name: np.select(conditions, [relevance[i] for _, relevance in RELEVANCE_RULES], DEFAULT_RELEVANCE[i])
+        for i, name in enumerate(['Relevance_PE', 'Relevance_PB', 'Relevance_EV'])
+    }, index=sectors.index)
 
-    # --- 5. PIVOT SCREENER DATA ---
-    print("Pivoting Screener data...")
-    static_cols = ['NSE Symbol', 'BSE Code', 'Company Name', 'Sector', 'Industry']
-    df_base = df_screen[static_cols].drop_duplicates()
+# --- XLSX CELL PREPARATION ---
+def resolve_column(df, col_name):
+    """Maps a layout column to the source column that feeds it (exact, then 'X_TTM', then spaced name)."""
+    for candidate in (col_name, col_name.replace("TTM_", "") + "_TTM", col_name.replace("_", " ")):
+        if candidate in df.columns: return candidate
+    return None
+
+def excel_cells(series):
+    """Numbers where the cell parses as one, the original text otherwise, None for blanks."""
+    numbers = pd.to_numeric(series, errors='coerce')
+    blank = series.isna() | (series.astype(str) == "")
+    cells = np.where(numbers.notna(), numbers.astype(object), series.astype(str).astype(object))
+    cells[blank.to_numpy()] = None
+    return cells
+
+# --- LONG -> WIDE PIVOT ---
+def merge_key(df):
+    """NSE Symbol where known, else BSE Code."""
+    return np.where((df['NSE Symbol'].notna()) & (df['NSE Symbol'] != "N/A"), df['NSE Symbol'], df['BSE Code'])
+
+def pivot_screener(df_screen, static_cols):
+    """One row per company, one '{metric}_{period}' column per non-blank cell (vectorized)."""
+    value_cols = [c for c in df_screen.columns if c not in static_cols + ['Section', 'Metric']]
+    keys = pd.Series(merge_key(df_screen), index=df_screen.index)
+
+    # Row-major stack: the same visiting order as walking every row, then every column
+    cells = df_screen[value_cols].stack(future_stack=True)
+    row_pos, col_names = cells.index.get_level_values(0), cells.index.get_level_values(1)
+    keep = cells.notna().to_numpy() & (cells.astype(str).str.strip() != "").to_numpy()
+
+    long = pd.DataFrame({
+        'Merge_Key': keys.loc[row_pos[keep]].to_numpy(),
+        'Column': (df_screen['Metric'].loc[row_pos[keep]].astype(str).to_numpy() + "_" + col_names[keep].astype(str))
+                  .str.replace(" ", "_").str.replace("-", "_"),
+        'Value': cells.to_numpy()[keep]
+    })
+    # Columns keep first-seen order; later cells overwrite earlier ones for the same company/column, like the old dict build
+    columns = pd.unique(long['Column'])
+    long = long.drop_duplicates(['Merge_Key', 'Column'], keep='last')
+
+    wide = long.set_index(['Merge_Key', 'Column'])['Value'].unstack('Column')
+    wide = wide.reindex(index=pd.unique(long['Merge_Key']), columns=columns)
+    wide.columns.name = None
+    return wide.rename_axis('Merge_Key').reset_index()
 
+def pivot_screener_legacy(df_screen, static_cols):
+    """The original row-by-row pivot, kept as the reference for benchmark_pivot()."""
     wide_data = {}
     for _, row in df_screen.iterrows():
         key = row['NSE Symbol'] if pd.notna(row['NSE Symbol']) and row['NSE Symbol'] != "N/A" else row['BSE Code']
@@ -56,57 +121,70 @@ def main():
             
         metric = row['Metric']
         for col in df_screen.columns:
-            if col not in static_cols + ['Section', 'Metric'] and pd.notna(row[col]) and row[col].strip() != "":
+            if col not in static_cols + ['Section', 'Metric'] and pd.notna(row[col]) and str(row[col]).strip() != "":
                 col_name = f"{metric}_{col}".replace(" ", "_").replace("-", "_")
                 wide_data[key][col_name] = row[col]
 
     df_wide_screen = pd.DataFrame.from_dict(wide_data, orient='index').reset_index()
     df_wide_screen.rename(columns={'index': 'Merge_Key'}, inplace=True)
+    return df_wide_screen
 
-    df_base['Merge_Key'] = np.where((df_base['NSE Symbol'].notna()) & (df_base['NSE Symbol'] != "N/A"), df_base['NSE Symbol'], df_base['BSE Code'])
-    df_manual['Merge_Key'] = np.where((df_manual['NSE Symbol'].notna()) & (df_manual['NSE Symbol'] != "N/A"), df_manual['NSE Symbol'], df_manual['BSE Code'])
-
-    df_screen_final = pd.merge(df_base, df_wide_screen, on="Merge_Key", how="left")
-
-    # --- 6. MASTER MERGE & ORPHANING ---
-    print("Executing Master Merge...")
-    master_df = pd.merge(df_screen_final, df_manual, on="Merge_Key", how="outer", indicator=True)
-    
-    orphans = master_df[master_df['_merge'] != 'both'].copy()
-    orphans.to_csv(ORPHAN_PATH, index=False)
-    print(f"Isolated {len(orphans)} orphaned records to {ORPHAN_PATH}.")
+def benchmark_pivot(n_companies=5000, n_metrics=40, n_periods=12):
+    """Times the legacy and vectorized pivots on a synthetic long table and checks they agree."""
+    import time
+    rng = np.random.default_rng(0)
+    periods = [f"Mar {y}" for y in range(2026 - n_periods, 2026)]
+    n_rows = n_companies * n_metrics
+    company = np.repeat(np.arange(n_companies), n_metrics)
+    values = rng.normal(100, 50, (n_rows, n_periods)).round(2).astype(str)
+    values[rng.random((n_rows, n_periods)) < 0.2] = ""
+    df = pd.DataFrame(values, columns=periods)
+    df.insert(0, 'NSE Symbol', np.where(company % 10 == 0, "N/A", [f"SYM{c}" for c in company]))
+    df.insert(1, 'BSE Code', [str(500000 + c) for c in company])
+    df.insert(2, 'Company Name', [f"Company {c}" for c in company])
+    df.insert(3, 'Sector', "Chemicals")
+    df.insert(4, 'Industry', "Specialty Chemicals")
+    # Every 4th metric name repeats in a second section, exercising the overwrite rule
+    metric_ids = np.tile(np.arange(n_metrics), n_companies)
+    df.insert(5, 'Section', np.where(metric_ids % 2 == 0, "Profit & Loss", "Quarterly Results"))
+    df.insert(6, 'Metric', [f"Metric {m - 1 if m % 4 == 1 else m}" for m in metric_ids])
+    df = df.replace("", np.nan)
+    static_cols = ['NSE Symbol', 'BSE Code', 'Company Name', 'Sector', 'Industry']
 
-    master = master_df[master_df['_merge'] == 'both'].copy()
-    
-    master[['Relevance_PE', 'Relevance_PB', 'Relevance_EV']] = master.apply(
-        lambda row: pd.Series(get_relevance(row['Sector'])), axis=1
-    )
+    print(f"Benchmarking pivot on {n_companies:,} companies x {n_metrics} metrics x {n_periods} periods ({len(df):,} rows)...")
+    t0 = time.perf_counter(); legacy = pivot_screener_legacy(df, static_cols); t1 = time.perf_counter()
+    fast = pivot_screener(df, static_cols); t2 = time.perf_counter()
+    # Row order of this intermediate frame is irrelevant: the merge in main() follows df_base
+    pd.testing.assert_frame_equal(legacy.sort_values('Merge_Key', ignore_index=True), fast.sort_values('Merge_Key', ignore_index=True))
+    print(f"Legacy iterrows : {t1 - t0:8.2f}s")
+    print(f"Vectorized      : {t2 - t1:8.2f}s  ({(t1 - t0) / (t2 - t1):.0f}x faster, identical output)")
 
-    # --- 7. EXACT COLUMN LAYOUT ---
-    columns = [
-        "NSE_Symbol", "BSE_Code", "Company_Name", "Sector", "Industry",
-        "Current_Price", "Market_Cap", "52W_High", "52W_Low", "%_Away_52W_High",
-        "Promoter_%", "FII_%", "DII_%", "Public_%",
-        "2024_High", "2024_Low", "2024_Close", "2025_Exit_Price",
-        "2025_Yearly_Pivot", "2025_R1", "2025_S1", "Distance_to_Pivot_%",
-        "TTM_Sales", "TTM_Expenses", "TTM_Operating_Profit", "TTM_Net_Profit", "TTM_EPS",
-        "Total_Debt", "Cash_Equivalents", "Book_Value", "Shares_Outstanding",
-        "ROE_Last_Year", "ROE_3Yr", "ROCE_Last_Year", "OPM_%",
-        "1Yr_Sales_Growth", "3Yr_Sales_Growth", "1Yr_Profit_Growth", "3Yr_Profit_Growth",
-        "5Yr_Median_PE", "5Yr_Median_PB", "5Yr_Median_EV",
-        "Sector_Median_PE", "Active_PE_Anchor", "Active_PB_Anchor", "Active_EV_Anchor",
-        "Q3_FY25_EPS", "Q4_FY25_EPS", "Q3_FY26_EPS",
-        "Est_Q4_FY26_EPS", "FY26E_EPS", "FY26E_EBITDA",
-        "FV_1_PE", "FV_2_EVEBITDA", "FV_3_PB", "FV_4_Graham",
-        "Relevance_PE", "Relevance_PB", "Relevance_EV",
-        "Sector_Weighted_FV", "Sector_Agnostic_FV", "Market_Weighted_FV"
-    ]
+# --- EXACT COLUMN LAYOUT ---
+COLUMNS = [
+    "NSE_Symbol", "BSE_Code", "Company_Name", "Sector", "Industry",
+    "Current_Price", "Market_Cap", "52W_High", "52W_Low", "%_Away_52W_High",
+    "Promoter_%", "FII_%", "DII_%", "Public_%",
+    "2024_High", "2024_Low", "2024_Close", "2025_Exit_Price",
+    "2025_Yearly_Pivot", "2025_R1", "2025_S1", "Distance_to_Pivot_%",
+    "TTM_Sales", "TTM_Expenses", "TTM_Operating_Profit", "TTM_Net_Profit", "TTM_EPS",
+    "Total_Debt", "Cash_Equivalents", "Book_Value", "Shares_Outstanding",
+    "ROE_Last_Year", "ROE_3Yr", "ROCE_Last_Year", "OPM_%",
+    "1Yr_Sales_Growth", "3Yr_Sales_Growth", "1Yr_Profit_Growth", "3Yr_Profit_Growth",
+    "5Yr_Median_PE", "5Yr_Median_PB", "5Yr_Median_EV",
+    "Sector_Median_PE", "Active_PE_Anchor", "Active_PB_Anchor", "Active_EV_Anchor",
+    "Q3_FY25_EPS", "Q4_FY25_EPS", "Q3_FY26_EPS",
+    "Est_Q4_FY26_EPS", "FY26E_EPS", "FY26E_EBITDA",
+    "FV_1_PE", "FV_2_EVEBITDA", "FV_3_PB", "FV_4_Graham",
+    "Relevance_PE", "Relevance_PB", "Relevance_EV",
+    "Sector_Weighted_FV", "Sector_Agnostic_FV", "Market_Weighted_FV"
+]
 
-    col_map = {col: col_letter(idx) for idx, col in enumerate(columns)}
-    def R(col_name): return f"{col_map[col_name]}4"
+# --- NATIVE EXCEL FORMULAS ---
+def build_formulas(col_map, row):
+    """Excel formula for every computed layout column, referencing the cells of `row` (1-based)."""
+    def R(col_name): return f"{col_map[col_name]}{row}"
 
-    # --- 8. BUILD ROW 2: NATIVE EXCEL FORMULAS ---
-    formulas = {c: "" for c in columns} 
+    formulas = {c: "" for c in COLUMNS}
     
     formulas["%_Away_52W_High"] = f"=IFERROR(({R('Current_Price')}-{R('52W_High')})/{R('52W_High')}, \"\")"
     formulas["2025_Yearly_Pivot"] = f"=IFERROR(({R('2024_High')}+{R('2024_Low')}+{R('2024_Close')})/3, \"\")"
@@ -134,10 +212,158 @@ def main():
     formulas["Sector_Agnostic_FV"] = f"=IFERROR(AVERAGE({R('FV_1_PE')}, {R('FV_2_EVEBITDA')}, {R('FV_3_PB')}, {R('FV_4_Graham')}), \"\")"
     formulas["Market_Weighted_FV"] = f"=IFERROR({R('Sector_Weighted_FV')} * IF({R('Market_Cap')}>50000, 1.0, IF({R('Market_Cap')}>5000, 0.9, 0.75)), \"\")"
 
+    return formulas
+
+# --- PYTHON EVALUATION OF THE SAME FORMULAS ---
+def compute_valuations(cells):
+    """Evaluates build_formulas() for every company at once with pandas/NumPy.
+
+    `cells` holds the typed layout cells (float, text or None for blank). Like Excel, blank
+    inputs count as 0 in arithmetic, text inputs make the expression fail, and IFERROR falls
+    back. In a comparison Excel ranks any text above every number, so a text Market_Cap
+    takes the > 50000 branch. Sector_Median_PE is a groupby median of the non-blank 5Yr_Median_PE values. The
+    MEDIAN(IF(...$4:$5000)) array formula also counted same-sector blanks as 0 and stopped at
+    row 5000. Returns {column: object array} with floats, text results, and None where
+    Excel would show "" or an error.
+    """
+    blank = cells.isna()
+    num = cells.apply(lambda c: pd.to_numeric(c, errors='coerce'))
+    def v(col): return num[col].mask(blank[col], 0.0) # Excel arithmetic value: blank -> 0, text -> NaN
+    def div(a, b): return a / b.where(b != 0)
+    def text(col): return cells[col].where(num[col].isna() & ~blank[col]) # Text cells a formula can return as-is
+
+    pivot = (v('2024_High') + v('2024_Low') + v('2024_Close')) / 3
+    shares = div(v('Market_Cap'), v('Current_Price'))
+
+    sector_pe = num['5Yr_Median_PE'].groupby(cells['Sector']).transform('median')
+    pe_anchor = sector_pe.where(blank['5Yr_Median_PE'], num['5Yr_Median_PE'])
+    pb_anchor = num['5Yr_Median_PB'].mask(blank['5Yr_Median_PB'], 1.5)
+    ev_anchor = num['5Yr_Median_EV'].mask(blank['5Yr_Median_EV'], 10)
+
+    # IFERROR(3Yr_Profit_Growth, 0.1) only falls back on an error value, which an input cell never holds
+    growth = v('3Yr_Profit_Growth')
+    est_q4 = (div(v('Q4_FY25_EPS'), v('Q3_FY25_EPS')) * v('Q3_FY26_EPS')).fillna(v('Q3_FY26_EPS') * (1 + growth))
+    fy26_eps = (v('TTM_EPS') - v('Q4_FY25_EPS') + est_q4).fillna(v('TTM_EPS'))
+    fy26_ebitda = (v('TTM_Operating_Profit') * (1 + growth)).fillna(v('TTM_Operating_Profit'))
+
+    fv_1 = fy26_eps * pe_anchor
+    fv_2 = div(fy26_ebitda * ev_anchor - v('Total_Debt') + v('Cash_Equivalents'), shares)
+    fv_3 = v('Book_Value') * pb_anchor
+    graham = 22.5 * v('TTM_EPS') * v('Book_Value')
+    fv_4 = np.sqrt(graham.where(graham >= 0))
+
+    sector_weighted = pd.Series(np.where(cells['Relevance_PB'] == "HIGH", fv_3 * 0.7 + fv_1 * 0.3,
+                                np.where(cells['Relevance_EV'] == "HIGH", fv_2 * 0.7 + fv_1 * 0.3, fv_1)), index=cells.index)
+    # AVERAGE skips the "" / "Negative Core" text results, i.e. the NaNs here
+    agnostic = pd.concat([fv_1, fv_2, fv_3, fv_4], axis=1).mean(axis=1)
+    market_cap = v('Market_Cap')
+    cap_is_text = num['Market_Cap'].isna() & ~blank['Market_Cap']
+    market_weighted = sector_weighted * np.select([cap_is_text | (market_cap > 50000), market_cap > 5000], [1.0, 0.9], 0.75)
+
+    values = {
+        "%_Away_52W_High": div(v('Current_Price') - v('52W_High'), v('52W_High')),
+        "2025_Yearly_Pivot": pivot,
+        "2025_R1": 2 * pivot - v('2024_Low'),
+        "2025_S1": 2 * pivot - v('2024_High'),
+        "Distance_to_Pivot_%": div(v('Current_Price') - pivot, pivot),
+        "Shares_Outstanding": shares,
+        "Sector_Median_PE": sector_pe,
+        "Active_PE_Anchor": pe_anchor,
+        "Active_PB_Anchor": pb_anchor,
+        "Active_EV_Anchor": ev_anchor,
+        "Est_Q4_FY26_EPS": est_q4,
+        "FY26E_EPS": fy26_eps,
+        "FY26E_EBITDA": fy26_ebitda,
+        "FV_1_PE": fv_1,
+        "FV_2_EVEBITDA": fv_2,
+        "FV_3_PB": fv_3,
+        "FV_4_Graham": fv_4,
+        "Sector_Weighted_FV": sector_weighted,
+        "Sector_Agnostic_FV": agnostic,
+        "Market_Weighted_FV": market_weighted,
+    }
+    # IF(ISBLANK(x), ..., x) and the IFERROR(..., x) fallbacks hand a text input straight back
+    passthrough = {"Active_PE_Anchor": '5Yr_Median_PE', "Active_PB_Anchor": '5Yr_Median_PB', "Active_EV_Anchor": '5Yr_Median_EV',
+                   "FY26E_EPS": 'TTM_EPS', "FY26E_EBITDA": 'TTM_Operating_Profit'}
+    out = {}
+    for col, series in values.items():
+        arr = series.to_numpy(dtype=float).astype(object)
+        arr[~np.isfinite(series.to_numpy(dtype=float))] = "Negative Core" if col == "FV_4_Graham" else None
+        if col in passthrough:
+            raw = text(passthrough[col]).to_numpy()
+            arr = np.where(pd.notna(raw), raw, arr)
+        out[col] = arr
+    return out
+
+def build_matrix(df_screen, df_manual, mode=COMPUTE_MODE):
+    """Pivots the screener rows, merges them with the manual datasets and lays out every data row.
+
+    Returns (cell matrix in COLUMNS order, orphaned records). Outside "formulas" mode the
+    valuation columns hold the Python-computed results.
+    """
+    # --- 5. PIVOT SCREENER DATA ---
+    print("Pivoting Screener data...")
+    static_cols = ['NSE Symbol', 'BSE Code', 'Company Name', 'Sector', 'Industry']
+    df_base = df_screen[static_cols].drop_duplicates()
+
+    df_wide_screen = pivot_screener(df_screen, static_cols)
+
+    df_base['Merge_Key'] = merge_key(df_base)
+    df_manual['Merge_Key'] = merge_key(df_manual)
+
+    df_screen_final = pd.merge(df_base, df_wide_screen, on="Merge_Key", how="left")
+
+    # --- 6. MASTER MERGE & ORPHANING ---
+    print("Executing Master Merge...")
+    master_df = pd.merge(df_screen_final, df_manual, on="Merge_Key", how="outer", indicator=True)
+    
+    orphans = master_df[master_df['_merge'] != 'both'].copy()
+    master = master_df[master_df['_merge'] == 'both'].copy()
+    
+    master[['Relevance_PE', 'Relevance_PB', 'Relevance_EV']] = tag_relevance(master['Sector'])
+
+    # --- 7. EXACT COLUMN LAYOUT ---
+    # Aliases resolved and cells typed once per column
+    columns = COLUMNS
+    sources = [resolve_column(master, col_name) for col_name in columns]
+    matrix = np.empty((len(master), len(columns)), dtype=object)
+    for col_num, source in enumerate(sources):
+        if source is not None: matrix[:, col_num] = excel_cells(master[source])
+
+    if mode != "formulas":
+        print("Computing valuation formulas in Python...")
+        for col_name, values in compute_valuations(pd.DataFrame(matrix, columns=columns)).items():
+            matrix[:, columns.index(col_name)] = values
+    return matrix, orphans
+
+def main(mode=COMPUTE_MODE):
+    print("Loading datasets...")
+    try:
+        df1 = pd.read_csv(DS1_PATH, dtype=str)
+        df2 = pd.read_csv(DS2_PATH, dtype=str)
+        df_screen = load_screener(SCREENER_PATH)
+    except Exception as e:
+        print(f"Error loading files: {e}")
+        return
+
+    # --- 4. MERGE DATASET 1 & 2 ---
+    df_manual = pd.merge(df1, df2, on=["NSE Symbol", "BSE Code"], how="outer")
+
+    matrix, orphans = build_matrix(df_screen, df_manual, mode)
+    orphans.to_csv(ORPHAN_PATH, index=False)
+    print(f"Isolated {len(orphans)} orphaned records to {ORPHAN_PATH}.")
+
+    columns = COLUMNS
+    col_map = {col: col_letter(idx) for idx, col in enumerate(columns)}
+
+    # --- 8. BUILD ROW 2: NATIVE EXCEL FORMULAS ---
+    formulas = build_formulas(col_map, 4)
+
     # --- 9. EXPORT TO XLSX ---
     print(f"Writing Master Matrix to {OUTPUT_PATH}...")
     
-    workbook = xlsxwriter.Workbook(OUTPUT_PATH)
+    # constant_memory streams each finished row to disk; text cells are never reinterpreted as formulas/URLs
+    workbook = xlsxwriter.Workbook(OUTPUT_PATH, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
     worksheet = workbook.add_worksheet("Valuation Matrix")
     
     # Formats
@@ -157,36 +383,26 @@ def main():
             
     # Row 3 / Index 2 is implicitly left blank by jumping to row 3 for data
     
-    # Write Data (Row 4+ / Index 3+)
-    row_idx = 3
-    for _, row in master.iterrows():
-        for col_num, col_name in enumerate(columns):
-            alt_name_1 = col_name.replace("TTM_", "") + "_TTM"
-            alt_name_2 = col_name.replace("_", " ")
-            
-            if col_name in master.columns:
-                val = row[col_name]
-            elif alt_name_1 in master.columns:
-                val = row[alt_name_1]
-            elif alt_name_2 in master.columns:
-                val = row[alt_name_2]
-            else:
-                val = "" 
-                
-            # Clean up floats vs strings for Excel
-            if pd.notna(val) and val != "":
-                try:
-                    worksheet.write_number(row_idx, col_num, float(val))
-                except ValueError:
-                    worksheet.write_string(row_idx, col_num, str(val))
-            else:
-                worksheet.write_blank(row_idx, col_num, "")
-                
-        row_idx += 1
+    # Write Data (Row 4+ / Index 3+): bulk row writes
+    # The sector median stays a plain value in "both" mode: its array formula is what makes Excel recalculation crawl
+    live_formulas = [(col_num, col_name) for col_num, col_name in enumerate(columns) if formulas[col_name] and col_name != "Sector_Median_PE"]
+    for offset, row in enumerate(matrix):
+        worksheet.write_row(3 + offset, 0, row)
+        if mode == "both":
+            row_formulas = build_formulas(col_map, 4 + offset)
+            for col_num, col_name in live_formulas:
+                cached = row[col_num]
+                worksheet.write_formula(3 + offset, col_num, row_formulas[col_name], None, "" if cached is None else cached)
 
     workbook.close()
-    print(f":white_check_mark: Success! Master Matrix saved to {OUTPUT_PATH}. Ready for manual drag-down.")
+    if mode == "formulas": print(f":white_check_mark: Success! Master Matrix saved to {OUTPUT_PATH}. Ready for manual drag-down.")
+    else: print(f":white_check_mark: Success! Master Matrix saved to {OUTPUT_PATH} with computed valuations ({mode}).")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Builds the master valuation matrix workbook.")
+    parser.add_argument("--mode", choices=["formulas", "values", "both"], default=COMPUTE_MODE, help="How valuation columns are filled")
+    parser.add_argument("--benchmark", action="store_true", help="Time the legacy vs vectorized pivot instead")
+    args = parser.parse_args()
+    if args.benchmark: benchmark_pivot()
+    else: main(args.mode)
 
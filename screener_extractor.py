@@ -1,49 +1,50 @@
 import os
+import sys
 import csv
 import re
 import logging
-from bs4 import BeautifulSoup
+import argparse
 from datetime import datetime
 
+# Shared backend helpers live next to the Streamlit backend scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenerscraper"))
+from screenerscraper_pool import iter_parsed, default_workers
+from screenerscraper_columnar import ColumnarWriter, COLUMNAR_FORMATS, columnar_path
+from screenerscraper_backend import read_soup, get_backend, set_backend, set_targeted, PARSER_BACKENDS, page_targets
+from screenerscraper_store import list_html_files
+from screenerscraper_normalize import parse_cell, clean_label
+from screenerscraper_record import CompanyRecord, CompanyHeader, SectionBlock, RecordSpill
+from screenerscraper_shard import parse_shard, select_shard, shard_name, find_shards, write_summary, merge_summaries, merge_csv, merge_columnar
+
 # --- CONFIGURATION ---
 HTML_DIR = "screenerhtml"  # Your main folder with 5000+ files
 OUTPUT_CSV = f"screenerscraped-{datetime.now().strftime('%Y-%m-%d')}.csv"
+SHARD_STEM = "screenerscraped"  # --shard writes screenerscraped.shard-i-of-N.csv (+ .json summary) for --merge
 ERROR_LOG = "screener_scraper_errors.log"
+WORKERS = default_workers()  # Parser processes; 1 = serial
+AUDIT_KEYS = ['quarters', 'profit-loss', 'balance-sheet', 'cash-flow', 'ratios', 'shareholding', 'ranges-table']
+BASE_HEADERS = ["Broad Sector", "Sector", "Broad Industry", "Industry", "Company Name", "BSE Code", "NSE Symbol", "Section", "Metric"]
 
 # Silently logs errors so your console stays clean
 logging.basicConfig(filename=ERROR_LOG, level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def clean_value(text):
-    """Strips commas, normalizes spacing, and converts % to pure decimals."""
-    if not text: return ""
-    clean = text.replace(',', '').strip()
-    clean = re.sub(r'\s+', ' ', clean)
-    
-    if clean.endswith('%') and len(clean) > 1:
-        try: return round(float(clean[:-1]) / 100, 4)
-        except ValueError: return clean
-    elif clean == '%':
-        return ""
-        
-    try: return float(clean)
-    except ValueError: return clean
+    """Typed cell value (float, % as a decimal, text); blanks stay '' so the CSV keeps empty cells."""
+    return parse_cell(text, blank="")
 
 def get_clean_label(td_element):
     """Surgically extracts labels, handling ALL '+' signs and removing hidden tooltips."""
     for tooltip in td_element.find_all(class_='tooltip'):
         tooltip.decompose()
         
-    raw_text = td_element.get_text(separator=' ', strip=True)
-    # Specifically removes the '+' from 'Sales +', 'Borrowings +', etc.
-    clean_text = raw_text.replace('+', '').strip()
-    return re.sub(r'\s+', ' ', clean_text)
+    # clean_label drops the '+' from 'Sales +', 'Borrowings +', etc.
+    return clean_label(td_element.get_text(separator=' ', strip=True))
 
 def parse_screener_html(filepath, audit_tracker):
-    """Parses HTML into the strict 'Long' format (Metrics as Rows)."""
-    company_rows = []
+    """Parses HTML into a typed CompanyRecord; record_rows() expands it to the strict 'Long' format (Metrics as Rows)."""
+    blocks = [] # (section name, [(metric, {period: value})]) in page order
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+    soup = read_soup(filepath, targets=page_targets())
 
     # --- 1. BASE IDENTIFIERS (Repeated on every row) ---
     base_info = {
@@ -52,7 +53,7 @@ def parse_screener_html(filepath, audit_tracker):
     }
     
     h1 = soup.find('h1')
-    if h1: base_info['Company Name'] = clean_value(h1.text.replace('+', ''))
+    if h1: base_info['Company Name'] = clean_value(h1.text)
 
     for link in soup.find_all('a', href=True):
         if 'bseindia.com' in link['href']:
@@ -71,17 +72,13 @@ def parse_screener_html(filepath, audit_tracker):
     # --- 2. TOP RATIOS (Static Values) ---
     top_ratios = soup.find('ul', id='top-ratios')
     if top_ratios:
+        rows = []
         for li in top_ratios.find_all('li'):
             name = li.find('span', class_='name')
             value = li.find('span', class_='number')
             if name and value:
-                row = base_info.copy()
-                row.update({
-                    'Section': 'Top Info',
-                    'Metric': clean_value(name.text),
-                    'Static': clean_value(value.text)
-                })
-                company_rows.append(row)
+                rows.append((clean_value(name.text), {'Static': clean_value(value.text)}))
+        blocks.append(('Top Info', rows))
 
     # --- 3. STANDARD TABLES (Time Series Data) ---
     sections_to_parse = {
@@ -103,6 +100,7 @@ def parse_screener_html(filepath, audit_tracker):
         audit_tracker[section_id] += 1 
 
         headers = [clean_value(th.text) for th in table.find('thead').find_all('th')]
+        rows = []
         
         for tr in table.find('tbody').find_all('tr'):
             cols = tr.find_all('td')
@@ -111,15 +109,14 @@ def parse_screener_html(filepath, audit_tracker):
             metric_name = get_clean_label(cols[0])
             if not metric_name or metric_name == 'Raw PDF': continue
             
-            row = base_info.copy()
-            row.update({'Section': section_name, 'Metric': metric_name})
-            
+            row = {}
             for idx, col in enumerate(cols[1:], start=1):
                 if idx < len(headers):
                     period = headers[idx]
                     row[period] = clean_value(col.text)
             
-            company_rows.append(row)
+            rows.append((metric_name, row))
+        blocks.append((section_name, rows))
 
     # --- 4. CAGR & GROWTH TABLES (Static Values) ---
     cagr_found = False
@@ -130,20 +127,31 @@ def parse_screener_html(filepath, audit_tracker):
         cagr_found = True
         section_name = clean_value(th.text)
         
+        rows = []
         for tr in range_table.find_all('tr'):
             cols = tr.find_all('td')
             if len(cols) >= 2:
-                row = base_info.copy()
-                row.update({
-                    'Section': section_name,
-                    'Metric': clean_value(cols[0].text),
-                    'Static': clean_value(cols[1].text)
-                })
-                company_rows.append(row)
+                rows.append((clean_value(cols[0].text), {'Static': clean_value(cols[1].text)}))
+        blocks.append((section_name, rows))
                 
     if cagr_found: audit_tracker['ranges-table'] += 1
 
-    return company_rows
+    return CompanyRecord(CompanyHeader.from_dict(base_info),
+                         [(name, SectionBlock.from_rows(rows, typed=True)) for name, rows in blocks if rows])
+
+def record_rows(record):
+    """One row dict per metric: base info, Section, Metric, then the metric's period values."""
+    base_info = record.header.to_dict()
+    for section_name, block in record.sections:
+        for metric_name, cells in block.items():
+            row = dict(base_info, Section=section_name, Metric=metric_name)
+            row.update(cells)
+            yield row
+
+def parse_screener_file(filepath):
+    """Worker entry point: parses one file against its own audit tracker so hits can be summed in the parent."""
+    audit_tracker = {k: 0 for k in AUDIT_KEYS}
+    return parse_screener_html(filepath, audit_tracker), audit_tracker
 
 def sort_period_columns(cols):
     """Sorts dynamic columns chronologically, pushing TTM and Static to the end."""
@@ -159,51 +167,11 @@ def sort_period_columns(cols):
         
     return sorted(cols, key=sort_key)
 
-def main():
-    print(f"\n:rocket: Starting Full Extraction from '{HTML_DIR}'...")
-    if not os.path.exists(HTML_DIR): return print(f":x: Error: Folder '{HTML_DIR}' not found. Check your path.")
-
-    files = [f for f in os.listdir(HTML_DIR) if f.endswith('.html')]
-    if not files: return print(f":x: Error: No HTML files found in '{HTML_DIR}'.")
-
-    all_rows = []
-    audit_tracker = {k: 0 for k in ['quarters', 'profit-loss', 'balance-sheet', 'cash-flow', 'ratios', 'shareholding', 'ranges-table']}
-
-    # 1. Parse all files
-    for idx, filename in enumerate(files):
-        try:
-            company_rows = parse_screener_html(os.path.join(HTML_DIR, filename), audit_tracker)
-            all_rows.extend(company_rows)
-            # Log progress every 250 files to ensure the console proves it isn't frozen
-            if (idx + 1) % 250 == 0 or (idx + 1) == len(files):
-                print(f":hourglass_flowing_sand: Parsed {idx + 1} / {len(files)} files...")
-        except Exception as e:
-            logging.error(f"Failed {filename}: {str(e)}")
-
-    # 2. Dynamically build and sort headers
-    print("\n:writing_hand: Compiling matrix and sorting chronological headers...")
-    period_columns = set()
-    base_headers = ["Broad Sector", "Sector", "Broad Industry", "Industry", "Company Name", "BSE Code", "NSE Symbol", "Section", "Metric"]
-    
-    for row in all_rows:
-        for key in row.keys():
-            if key not in base_headers:
-                period_columns.add(key)
-
-    sorted_periods = sort_period_columns(list(period_columns))
-    final_headers = base_headers + sorted_periods
-
-    # 3. Export Data
-    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=final_headers)
-        writer.writeheader()
-        writer.writerows(all_rows)
-
-    # 4. Final Audit Report
-    print(f"\n:white_check_mark: Success: Massive data matrix saved to '{OUTPUT_CSV}'")
+def print_audit(output_path, files, total_rows, audit_tracker):
+    print(f"\n:white_check_mark: Success: Massive data matrix saved to '{output_path}'")
     print("="*40 + "\n:bar_chart: FINAL AUDIT REPORT\n" + "="*40)
-    print(f"Files Scanned      : {len(files)}")
-    print(f"Total Metric Rows  : {len(all_rows):,}")  # Formats with commas for readability
+    print(f"Files Scanned      : {files}")
+    print(f"Total Metric Rows  : {total_rows:,}")  # Formats with commas for readability
     print("-" * 40)
     for k, v in audit_tracker.items():
         print(f" - {k.ljust(15)} : {v:,} hits")
@@ -212,5 +180,92 @@ def main():
         print("\n:warning: Note: Check 'screener_scraper_errors.log' for any malformed HTML files.")
     print("="*40 + "\n")
 
+def merge_shards(count, fmt):
+    """Combines the `count` shard outputs in the working directory under one chronologically sorted header."""
+    ext = ".csv" if fmt == "csv" else COLUMNAR_FORMATS[fmt]
+    try:
+        # Summaries first: a shard only writes its summary once its partial output is complete
+        summary = merge_summaries(find_shards(".", SHARD_STEM, ".json", count))
+        parts = find_shards(".", SHARD_STEM, ext, count)
+    except FileNotFoundError as e: return print(f":x: Error: {e}")
+    print(f"\n:link: Merging {count} shard outputs ({summary.get('files', 0)} files)...")
+    if fmt == "csv":
+        output_path = OUTPUT_CSV
+        rows = merge_csv(parts, output_path, BASE_HEADERS, sort_period_columns)
+    else:
+        output_path = columnar_path(OUTPUT_CSV, fmt)
+        rows = merge_columnar(parts, output_path, BASE_HEADERS, fmt, sort_period_columns)
+    print_audit(output_path, summary.get('files', 0), rows, {k: summary.get('audit', {}).get(k, 0) for k in AUDIT_KEYS})
+
+def main():
+    parser = argparse.ArgumentParser(description="Extracts every Screener HTML page into one long-format CSV.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Parser processes (1 = serial)")
+    parser.add_argument("--backend", choices=list(PARSER_BACKENDS), default=get_backend(), help="HTML tree builder")
+    parser.add_argument("--full-dom", action="store_true", help="Build the whole page tree instead of only the data sections")
+    parser.add_argument("--format", choices=["csv"] + list(COLUMNAR_FORMATS), default="csv", help="csv = text matrix; parquet/arrow = typed columnar file")
+    parser.add_argument("--shard", help="Only parse shard i of N (0-based, e.g. 0/4; pages are assigned by a stable hash of their name) and write partial outputs")
+    parser.add_argument("--merge", type=int, metavar="N", help="Combine the outputs of shards 0..N-1 in this folder into one file")
+    args = parser.parse_args()
+    if args.merge: return merge_shards(args.merge, args.format)
+    try: shard = parse_shard(args.shard)
+    except ValueError as e: return print(f":x: Error: {e}")
+    set_backend(args.backend)
+    set_targeted(not args.full_dom)
+
+    print(f"\n:rocket: Starting Full Extraction from '{HTML_DIR}' on {args.workers} worker(s) with the {args.backend} backend...")
+    if not os.path.exists(HTML_DIR): return print(f":x: Error: Folder '{HTML_DIR}' not found. Check your path.")
+
+    paths = list_html_files(HTML_DIR)
+    if not paths: return print(f":x: Error: No HTML files found in '{HTML_DIR}'.")
+    if shard:
+        paths = select_shard(paths, shard)
+        print(f":jigsaw: Shard {shard[0]}/{shard[1]}: {len(paths)} files.")
+        if not paths: print(":warning: This shard has no files; writing an empty partial output.")
+
+    audit_tracker = {k: 0 for k in AUDIT_KEYS}
+    base_headers = BASE_HEADERS
+    period_columns = set()
+    total_rows = 0
+
+    # Compact records are spilled to a temp file as each company is parsed, so memory stays flat however many files there are
+    with RecordSpill() as spill:
+        # 1. Parse all files (results stream back in file order; failures land in ERROR_LOG)
+        for idx, (fp, result) in enumerate(iter_parsed(paths, parse_screener_file, args.workers)):
+            if result is not None:
+                record, file_audit = result
+                spill.write(record)
+                for _, block in record.sections:
+                    total_rows += len(block)
+                    period_columns.update(block.periods)
+                for k, v in file_audit.items(): audit_tracker[k] += v
+            # Log progress every 250 files to ensure the console proves it isn't frozen
+            if (idx + 1) % 250 == 0 or (idx + 1) == len(paths):
+                print(f":hourglass_flowing_sand: Parsed {idx + 1} / {len(paths)} files...")
+
+        # 2. Dynamically build and sort headers
+        print("\n:writing_hand: Compiling matrix and sorting chronological headers...")
+        sorted_periods = sort_period_columns(list(period_columns))
+        final_headers = base_headers + sorted_periods
+
+        # 3. Export Data (replays the spill one company at a time under the merged header)
+        output_path = shard_name(SHARD_STEM, shard, ".csv") if shard else OUTPUT_CSV
+        if args.format == "csv":
+            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=final_headers)
+                writer.writeheader()
+                for record in spill:
+                    writer.writerows(record_rows(record))
+        else:
+            output_path = columnar_path(output_path, args.format)
+            writer = ColumnarWriter(output_path, base_headers, sorted_periods, args.format)
+            for record in spill:
+                for row in record_rows(record):
+                    writer.write_row([row.get(h, "") for h in base_headers], [row.get(p) for p in sorted_periods])
+            writer.close()
+
+    # 4. Final Audit Report (a shard also leaves its totals behind for --merge)
+    if shard: write_summary(shard_name(SHARD_STEM, shard, ".json"), {"files": len(paths), "rows": total_rows, "audit": audit_tracker})
+    print_audit(output_path, len(paths), total_rows, audit_tracker)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,27 +3,25 @@
 import os
 import csv
 import re
-from bs4 import BeautifulSoup
+from functools import partial
 from datetime import datetime
+from screenerscraper_pool import iter_parsed
+from screenerscraper_cache import ParseCache
+from screenerscraper_columnar import ColumnarWriter, columnar_path
+from screenerscraper_backend import read_soup, parser_signature, page_targets, PEERS_TARGET
+from screenerscraper_store import list_html_files
+from screenerscraper_xlsx import parse_xlsx, list_xlsx_files, XLSX_VERSION
+from screenerscraper_normalize import clean_text
+from screenerscraper_record import CompanyRecord, HEADER_FIELDS
+from screenerscraper_shard import parse_shard, select_shard, shard_name, find_shards, write_summary, merge_summaries, merge_csv
 
-def clean_text(text):
-    """Cleans text and converts % to pure decimals."""
-    clean = text.replace('+', '').replace(',', '').strip()
-    clean = re.sub(r'\s+', ' ', clean)
-    
-    if clean.endswith('%') and len(clean) > 1:
-        try:
-            num = float(clean[:-1])
-            return f"{num / 100:.4f}".rstrip('0').rstrip('.')
-        except ValueError:
-            return clean
-    elif clean == '%':
-        return ""
-    return clean
-
-def parse_html(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f: 
-        soup = BeautifulSoup(f, 'html.parser')
+# Bump whenever parse_html's / read_industry's output changes so cached records are rebuilt
+PARSER_VERSION = 2
+INDEX_VERSION = 1
+
+def parse_html(filepath, wanted=None):
+    """Parses one company page into a CompanyRecord. `wanted` ({section: set of metrics, or None for all}) skips everything else."""
+    soup = read_soup(filepath, targets=page_targets())
         
     data = {'static': {
         'Company Name': 'Unknown', 'BSE Code': 'N/A', 'NSE Symbol': 'N/A',
@@ -48,13 +46,15 @@ def parse_html(filepath):
 
     # 1. Top Info
     data['financials']['Top Info'] = {}
-    top_ratios = soup.find('ul', id='top-ratios')
+    top_ratios = soup.find('ul', id='top-ratios') if wanted is None or 'Top Info' in wanted else None
     if top_ratios:
+        keep = wanted and wanted['Top Info']
         for li in top_ratios.find_all('li'):
             name = li.find('span', class_='name')
             value = li.find('span', class_='number')
-            if name and value:
-                data['financials']['Top Info'][clean_text(name.text)] = {"Static": clean_text(value.text)}
+            if not name or not value: continue
+            metric_name = clean_text(name.text)
+            if not keep or metric_name in keep: data['financials']['Top Info'][metric_name] = {"Static": clean_text(value.text)}
 
     # 2. Standard Tables
     for sec in soup.find_all('section'):
@@ -63,6 +63,8 @@ def parse_html(filepath):
         if not h2 or not table or not table.find('thead'): continue
         
         section_name = clean_text(h2.text)
+        if wanted is not None and section_name not in wanted: continue
+        keep = wanted and wanted[section_name]
         data['financials'][section_name] = {}
         
         col_to_period = {}
@@ -84,7 +86,7 @@ def parse_html(filepath):
                     unwanted.decompose()
                     
                 metric_name = clean_text(row_name_td.get_text(separator=' ', strip=True))
-                if not metric_name: continue
+                if not metric_name or (keep and metric_name not in keep): continue
                 
                 data['financials'][section_name][metric_name] = {}
                 for idx, col in enumerate(cols):
@@ -97,96 +99,247 @@ def parse_html(filepath):
         th = range_table.find('th')
         if not th: continue
         section_name = clean_text(th.text)
+        if wanted is not None and section_name not in wanted: continue
+        keep = wanted and wanted[section_name]
         data['financials'][section_name] = {}
         for tr in range_table.find_all('tr'):
             cols = tr.find_all('td')
             if len(cols) == 2:
                 metric_name = clean_text(cols[0].text)
+                if keep and metric_name not in keep: continue
                 val = clean_text(cols[1].text)
                 data['financials'][section_name][metric_name] = {"Static": val}
 
-    return data
+    return CompanyRecord.from_dict(data)
+
+def read_industry(filepath):
+    """Cheap pre-pass: builds only #peers and returns the Industry exactly as parse_html would report it."""
+    peers = read_soup(filepath, targets=PEERS_TARGET).find('section', id='peers')
+    t = peers.find('a', title='Industry') if peers else None
+    return clean_text(t.text) if t else 'Unknown'
+
+def screen_by_industry(html_folder, files, active_sectors, workers=None, use_cache=True, status_text=None, cache_path=None):
+    """Drops files whose Industry is not active, using a persisted company -> industry index."""
+    if status_text: status_text.text(f"Indexing industries for {len(files)} companies...")
+    cache = ParseCache(html_folder, "read_industry", f"{INDEX_VERSION}-{parser_signature()}", cache_path) if use_cache else None
+    try:
+        # Unreadable pages are kept so the full parse logs them like any other failure
+        return [fp for fp, industry in iter_parsed(files, read_industry, workers, cache) if industry is None or industry in active_sectors]
+    finally:
+        if cache: cache.close()
 
 def get_target_periods(active_years, active_qtrs, inc_ttm):
     periods = ["TTM"] if inc_ttm else []
-    active_years.sort(reverse=True)
-    for y in active_years:
+    for y in sorted(active_years, reverse=True):
         for q in ["Dec", "Sep", "Jun", "Mar"]:
             if q in active_qtrs: periods.append(f"{q} {y}")
     return periods
 
-def run_parser(html_folder, active_years, active_qtrs, inc_ttm, active_metrics, active_sectors, progress_bar=None, status_text=None):
-    files = [os.path.join(html_folder, f) for f in os.listdir(html_folder) if f.endswith('.html')]
-    if not files: 
-        if status_text: status_text.error("No HTML files found.")
-        return
-
-    total_files = len(files)
-    target_periods = get_target_periods(active_years, active_qtrs, inc_ttm)
-    
-    header = [
-        "Broad Sector", "Sector", "Broad Industry", "Industry", 
-        "Company Name", "BSE Code", "NSE Symbol", "Section", "Metric"
-    ] + target_periods
-
-    out_file = f"screenerscraped-{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"
-    
-    with open(out_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        
-        for idx, fp in enumerate(files):
-            d = parse_html(fp)
-            stat = d['static']
-            
+BASE_HEADER = list(HEADER_FIELDS)
+
+class MetricPlan:
+    """The active metrics compiled once per run: (section, metric) -> output slots and period -> column.
+
+    fill() then turns a CompanyRecord into one value row per active metric by walking
+    only the sections and metrics in the plan. Static values (Top Info / growth tables) go to
+    `static_col`, time series to their period's column.
+    """
+    def __init__(self, active_metrics, target_periods, static_col=0):
+        self.keys = [(m.get('Section'), m.get('Metric')) for m in active_metrics]
+        self.sections = {}
+        for slot, (sec_name, met_name) in enumerate(self.keys):
+            self.sections.setdefault(sec_name, {}).setdefault(met_name, []).append(slot)
+        self.columns = {p: i for i, p in enumerate(target_periods)}
+        self.static_col = static_col
+        self.width = max(len(target_periods), static_col + 1)
+        # Static cells (Top Info / growth tables) only ever share a metric with other Static cells
+        self.lookup = dict(self.columns, Static=static_col)
+
+    @property
+    def wanted(self):
+        return {sec_name: frozenset(metrics) for sec_name, metrics in self.sections.items()}
+
+    def fill(self, record, blank=""):
+        rows = [[blank] * self.width for _ in self.keys]
+        lookup = self.lookup
+        for sec_name, metrics in self.sections.items():
+            section = record.section(sec_name)
+            if not section: continue
+            for met_name, slots in metrics.items():
+                # Only the target periods are read (and formatted) out of the block
+                cells = section.select(met_name, lookup)
+                if not cells: continue
+                row = rows[slots[0]]
+                for i, v in cells.items(): row[i] = v
+                for slot in slots[1:]: rows[slot] = row[:]
+        return rows
+
+def merge_wanted(sinks):
+    """Union of what the sinks read ({section: metrics or None}); None if any sink needs the whole record."""
+    merged = {}
+    for sink in sinks:
+        wanted = getattr(sink, 'wanted', None)
+        if wanted is None: return None
+        for sec_name, metrics in wanted.items():
+            if metrics is None or (sec_name in merged and merged[sec_name] is None): merged[sec_name] = None
+            else: merged[sec_name] = merged.get(sec_name, frozenset()) | metrics
+    return merged
+
+class FinancialSink:
+    """Writes the active metrics of every screened company to screenerscraped-<timestamp>.csv."""
+    def __init__(self, active_years, active_qtrs, inc_ttm, active_metrics):
+        self.target_periods = get_target_periods(active_years, active_qtrs, inc_ttm)
+        self.active_metrics = active_metrics
+        self.plan = MetricPlan(active_metrics, self.target_periods)
+        self.labels = [[sec_name, met_name] for sec_name, met_name in self.plan.keys]
+        self.out_file = f"screenerscraped-{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"
+
+    def open(self):
+        self.f = open(self.out_file, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(BASE_HEADER + ["Section", "Metric"] + self.target_periods)
+
+    @property
+    def wanted(self):
+        return self.plan.wanted
+
+    def write(self, d, base_info):
+        # Static (CAGR/Top Info) values land in the first period column, the rest stay blank
+        rows = self.plan.fill(d)
+        self.writer.writerows(base_info + labels + values for labels, values in zip(self.labels, rows))
+
+    def close(self):
+        self.f.close()
+
+class ColumnarSink(FinancialSink):
+    """Same rows as FinancialSink, written as typed Parquet / Arrow IPC: float periods plus a Static column."""
+    def __init__(self, active_years, active_qtrs, inc_ttm, active_metrics, fmt="parquet"):
+        super().__init__(active_years, active_qtrs, inc_ttm, active_metrics)
+        self.plan = MetricPlan(active_metrics, self.target_periods, static_col=len(self.target_periods))
+        self.fmt = fmt
+        self.out_file = columnar_path(self.out_file, fmt)
+
+    def open(self):
+        self.writer = ColumnarWriter(self.out_file, BASE_HEADER + ["Section", "Metric"], self.target_periods + ["Static"], self.fmt)
+
+    def write(self, d, base_info):
+        for labels, values in zip(self.labels, self.plan.fill(d, None)):
+            self.writer.write_row(base_info + labels, values)
+
+    def close(self):
+        self.writer.close()
+
+class ShareholdingSink:
+    """Writes the Shareholding Pattern of every screened company to shareholding-<timestamp>.csv."""
+    def __init__(self, active_years, active_qtrs):
+        self.target_periods = get_target_periods(active_years, active_qtrs, False)
+        self.columns = {p: i for i, p in enumerate(self.target_periods)}
+        self.out_file = f"shareholding-{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"
+        self.wanted = {'Shareholding Pattern': None}
+
+    def open(self):
+        self.f = open(self.out_file, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(BASE_HEADER + ["Metric"] + self.target_periods)
+
+    def write(self, d, base_info):
+        block = d.section('Shareholding Pattern')
+        for met_name in block.metrics if block else ():
+            cells = block.select(met_name, self.columns)
+            self.writer.writerow(base_info + [met_name] + [cells.get(i, "") for i in range(len(self.target_periods))])
+
+    def close(self):
+        self.f.close()
+
+def run_export(html_folder, sinks, active_sectors, progress_bar=None, status_text=None, workers=None, use_cache=True, source="html", shard=None):
+    """Parses every HTML file exactly once (across `workers` processes) and hands the result to each sink in file order.
+
+    With use_cache, unchanged pages are served from the on-disk parse cache instead of being re-parsed.
+    source="xlsx" reads the downloaded Excel exports in `html_folder` instead; they carry no sector
+    classification, so the sector filter is skipped for them. shard='i/N' only exports the pages
+    of that shard, with its own cache file so machines sharing the folder never write to the same
+    SQLite database. Returns the number of companies written.
+    """
+    shard = parse_shard(shard)
+    if source == "xlsx":
+        all_files = list_xlsx_files(html_folder)
+        parse_fn, namespace, version = parse_xlsx, "parse_xlsx", XLSX_VERSION
+        if active_sectors and status_text: status_text.text("Excel exports carry no sector classification: exporting every company.")
+        active_sectors = None
+    else:
+        all_files = list_html_files(html_folder)
+        parse_fn, namespace, version = parse_html, "parse_html", f"{PARSER_VERSION}-{parser_signature()}"
+        # Cached records stay complete so any later export can reuse them; uncached runs only build what the sinks read
+        wanted = merge_wanted(sinks)
+        if not use_cache and wanted is not None: parse_fn = partial(parse_html, wanted=wanted)
+    if not all_files: 
+        if status_text: status_text.error(f"No {'Excel' if source == 'xlsx' else 'HTML'} files found.")
+        return 0
+
+    cache_path = os.path.join(html_folder, shard_name(".parse_cache", shard, ".sqlite")) if shard else None
+    files = select_shard(all_files, shard)
+    active_sectors = set(active_sectors or [])
+    if active_sectors: files = screen_by_industry(html_folder, files, active_sectors, workers, use_cache, status_text, cache_path)
+
+    total_files, written = len(files), 0
+    cache = ParseCache(html_folder, namespace, version, cache_path) if use_cache else None
+    for sink in sinks: sink.open()
+    try:
+        for idx, (fp, d) in enumerate(iter_parsed(files, parse_fn, workers, cache, all_files)):
             if progress_bar: progress_bar.progress((idx + 1) / total_files)
+            if d is None:
+                if status_text: status_text.text(f"Processing ({idx + 1}/{total_files}): {os.path.basename(fp)} failed, see error log...")
+                continue
+
+            stat = d.header
             if status_text: status_text.text(f"Processing ({idx + 1}/{total_files}): {stat['Company Name']}...")
             
             if active_sectors and stat['Industry'] not in active_sectors: continue
-                
-            base_info = [stat['Broad Sector'], stat['Sector'], stat['Broad Industry'], stat['Industry'], stat['Company Name'], stat['BSE Code'], stat['NSE Symbol']]
 
-            for metric in active_metrics:
-                sec_name = metric.get('Section')
-                met_name = metric.get('Metric')
-                row = base_info.copy() + [sec_name, met_name]
-                
-                periods_data = d['financials'].get(sec_name, {}).get(met_name, {})
-                
-                # Logic to handle both Time-Series and Static (CAGR/Top Info) data
-                if "Static" in periods_data:
-                    row.append(periods_data["Static"])
-                    row.extend([""] * (len(target_periods) - 1)) # Pad the rest of the periods with blanks
-                else:
-                    for p in target_periods:
-                        row.append(periods_data.get(p, ""))
-                    
-                writer.writerow(row)
-
-def run_shareholding_parser(html_folder, active_years, active_qtrs, active_sectors, progress_bar=None, status_text=None):
-    files = [os.path.join(html_folder, f) for f in os.listdir(html_folder) if f.endswith('.html')]
-    if not files: return
-    
-    total_files = len(files)
-    target_periods = get_target_periods(active_years, active_qtrs, False) 
-    header = ["Broad Sector", "Sector", "Broad Industry", "Industry", "Company Name", "BSE Code", "NSE Symbol", "Metric"] + target_periods
-    out_file = f"shareholding-{datetime.now().strftime('%Y-%m-%d_%H-%M')}.csv"
-    
-    with open(out_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for idx, fp in enumerate(files):
-            d = parse_html(fp) 
-            stat = d['static']
-            
-            if progress_bar: progress_bar.progress((idx + 1) / total_files)
-            if status_text: status_text.text(f"Processing ({idx + 1}/{total_files}): {stat['Company Name']}...")
-            if active_sectors and stat['Industry'] not in active_sectors: continue
+            base_info = stat.as_list()
+            for sink in sinks: sink.write(d, base_info)
+            written += 1
+    finally:
+        for sink in sinks: sink.close()
+        if cache: cache.close()
+    return written
+
+def _run_sharded(stem, sink, html_folder, active_sectors, progress_bar, status_text, workers, use_cache, source, shard):
+    # A shard writes <stem>.shard-i-of-N.csv plus a summary that marks it complete for merge_parser_shards
+    shard = parse_shard(shard)
+    if shard: sink.out_file = shard_name(stem, shard, ".csv")
+    companies = run_export(html_folder, [sink], active_sectors, progress_bar, status_text, workers, use_cache, source, shard)
+    if shard: write_summary(shard_name(stem, shard, ".json"), {"companies": companies})
+    return companies
+
+def run_parser(html_folder, active_years, active_qtrs, inc_ttm, active_metrics, active_sectors, progress_bar=None, status_text=None, workers=None, use_cache=True, source="html", shard=None):
+    sink = FinancialSink(active_years, active_qtrs, inc_ttm, active_metrics)
+    return _run_sharded("screenerscraped", sink, html_folder, active_sectors, progress_bar, status_text, workers, use_cache, source, shard)
+
+def run_shareholding_parser(html_folder, active_years, active_qtrs, active_sectors, progress_bar=None, status_text=None, workers=None, use_cache=True, shard=None):
+    sink = ShareholdingSink(active_years, active_qtrs)
+    return _run_sharded("shareholding", sink, html_folder, active_sectors, progress_bar, status_text, workers, use_cache, "html", shard)
+
+def merge_parser_shards(count, folder="."):
+    """Combines the run_parser / run_shareholding_parser outputs of shards 0..count-1 into timestamped CSVs.
+
+    Returns {output file: companies}; an output none of the shards produced is skipped.
+    """
+    merged = {}
+    stamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    for stem, fixed in (("screenerscraped", BASE_HEADER + ["Section", "Metric"]), ("shareholding", BASE_HEADER + ["Metric"])):
+        if not any(os.path.exists(os.path.join(folder, shard_name(stem, (i, count), ".json"))) for i in range(count)): continue
+        summary = merge_summaries(find_shards(folder, stem, ".json", count))
+        out_file = os.path.join(folder, f"{stem}-{stamp}.csv")
+        merge_csv(find_shards(folder, stem, ".csv", count), out_file, fixed)
+        merged[out_file] = summary.get("companies", 0)
+    return merged
 
-            base_info = [stat['Broad Sector'], stat['Sector'], stat['Broad Industry'], stat['Industry'], stat['Company Name'], stat['BSE Code'], stat['NSE Symbol']]
-            if 'Shareholding Pattern' in d['financials']:
-                for met_name, periods_data in d['financials']['Shareholding Pattern'].items():
-                    row = base_info.copy() + [met_name]
-                    for p in target_periods:
-                        row.append(periods_data.get(p, ""))
-                    writer.writerow(row)
\ No newline at end of file
+if __name__ == "__main__":
+    # Merge step for sharded runs: python screenerscraper.py merge <N> [folder]
+    import sys
+    if len(sys.argv) < 3 or sys.argv[1] != "merge": sys.exit("Usage: python screenerscraper.py merge <N> [folder]")
+    merged = merge_parser_shards(int(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else ".")
+    if not merged: print(f"No shard outputs of {sys.argv[2]} shards found.")
+    for out_file, companies in merged.items():
+        print(f"Merged {companies} companies into '{out_file}'")
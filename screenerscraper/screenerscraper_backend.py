@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
+from screenerscraper_store import read_html, list_html_files
+
+# Backend name -> BeautifulSoup tree builder. lxml's C tree builder is several times faster
+# than the pure-Python html.parser, and both feed the exact same extraction code.
+PARSER_BACKENDS = {"lxml": "lxml", "bs4": "html.parser"}
+ENV_VAR = "SCREENER_PARSER_BACKEND"
+TARGETED_ENV_VAR = "SCREENER_TARGETED_PARSE"
+
+# Sections that never hold a data-table; their exchange links are still kept individually
+SKIPPED_SECTIONS = {"top", "analysis", "documents"}
+BSE_CODE_RE = re.compile(r'/(\d{6})/?$')
+NSE_SYMBOL_RE = re.compile(r'symbol=([^&]+)')
+
+def is_available(backend):
+    try:
+        BeautifulSoup("", PARSER_BACKENDS[backend])
+        return True
+    except FeatureNotFound:
+        return False
+
+def available_backends():
+    return [b for b in PARSER_BACKENDS if is_available(b)]
+
+def get_backend():
+    """The active backend: $SCREENER_PARSER_BACKEND if set, else the fastest one installed."""
+    backend = os.environ.get(ENV_VAR)
+    if backend in PARSER_BACKENDS: return backend
+    return "lxml" if is_available("lxml") else "bs4"
+
+def set_backend(backend):
+    # Stored in the environment so spawned parser workers pick the same backend
+    if backend not in PARSER_BACKENDS: raise ValueError(f"Unknown parser backend '{backend}'. Choose from {list(PARSER_BACKENDS)}.")
+    os.environ[ENV_VAR] = backend
+
+def is_targeted():
+    return os.environ.get(TARGETED_ENV_VAR, "1") != "0"
+
+def set_targeted(enabled):
+    os.environ[TARGETED_ENV_VAR] = "1" if enabled else "0"
+
+def parser_signature():
+    """Identifies the backend + mode combination, so caches never mix records built differently."""
+    return f"{get_backend()}-targeted" if is_targeted() else get_backend()
+
+def _is_page_target(name, attrs):
+    """Top-level elements the page parsers read: everything else is tokenized but never built into the tree."""
+    attrs = attrs or {}
+    if name == 'h1': return True
+    if name == 'a':
+        # Only links that can set a BSE Code / NSE Symbol, not the hundreds of announcement PDFs
+        href = attrs.get('href') or ''
+        if 'bseindia.com' in href: return bool(BSE_CODE_RE.search(href))
+        return 'nseindia.com' in href and bool(NSE_SYMBOL_RE.search(href))
+    if name == 'ul': return attrs.get('id') == 'top-ratios'
+    if name == 'table':
+        cls = attrs.get('class') or ''
+        return 'ranges-table' in (cls if isinstance(cls, str) else ' '.join(cls))
+    if name == 'section': return attrs.get('id') not in SKIPPED_SECTIONS
+    return False
+
+def _make_strainer(match_fn):
+    try:
+        from bs4.filter import ElementFilter # bs4 >= 4.13 calls allow_tag_creation(nsprefix, name, attrs)
+    except ImportError:
+        return SoupStrainer(match_fn) # Older bs4 calls a name function with (name, attrs) while parsing
+
+    class _TagFilter(ElementFilter):
+        def allow_tag_creation(self, nsprefix, name, attrs): return match_fn(name, attrs)
+        def allow_string_creation(self, string): return False
+    return _TagFilter()
+
+# h1, exchange links, #top-ratios, ranges-table blocks and every section that can hold a data-table
+PAGE_TARGETS = _make_strainer(_is_page_target)
+# Only the #peers classification block
+PEERS_TARGET = SoupStrainer('section', id='peers')
+
+def page_targets():
+    """PAGE_TARGETS in targeted mode, None (full DOM) otherwise."""
+    return PAGE_TARGETS if is_targeted() else None
+
+def make_soup(markup, backend=None, targets=None):
+    """Builds a soup; with `targets` only the matching subtrees are materialized."""
+    return BeautifulSoup(markup, PARSER_BACKENDS[backend or get_backend()], parse_only=targets)
+
+def read_soup(filepath, backend=None, targets=None):
+    return make_soup(read_html(filepath), backend, targets)
+
+def check_parity(files, parse_fns, backends=("bs4", "lxml")):
+    """Runs every parse_fn over every file under each backend, full and targeted, and returns the (file, fn) pairs that disagree."""
+    previous = {k: os.environ.get(k) for k in (ENV_VAR, TARGETED_ENV_VAR)}
+    mismatches = []
+    try:
+        for fp in files:
+            for fn in parse_fns:
+                results = []
+                for backend in backends:
+                    set_backend(backend)
+                    for targeted in (False, True):
+                        set_targeted(targeted)
+                        results.append(fn(fp))
+                if any(r != results[0] for r in results[1:]):
+                    mismatches.append((os.path.basename(fp), fn.__name__))
+    finally:
+        for k, v in previous.items():
+            if v is None: os.environ.pop(k, None)
+            else: os.environ[k] = v
+    return mismatches
+
+if __name__ == "__main__":
+    # Parity check: python screenerscraper_backend.py [html_dir] (defaults to the committed fixture pages)
+    from screenerscraper import parse_html
+    from screenerscraper_getmetrics import scan_metrics
+    from screenerscraper_getsectors import scan_sectors
+    from screenerscraper_getmeta import scan_meta
+
+    html_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "fixtures", "html")
+    files = list_html_files(html_dir)
+    mismatches = check_parity(files, [parse_html, scan_metrics, scan_sectors, scan_meta], available_backends())
+    print(f"Checked {len(files)} files across {available_backends()}: {len(mismatches)} mismatches.")
+    for name, fn in mismatches: print(f" - {name}: {fn}")
+    sys.exit(1 if mismatches else 0)
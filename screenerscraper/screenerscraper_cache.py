@@ -0,0 +1,86 @@
+import os
+import pickle
+import sqlite3
+
+CACHE_FILE = ".parse_cache.sqlite"
+META_FILE = ".fetch_meta.sqlite"
+
+class ParseCache:
+    """Persistent per-file cache of parse results, stored in a SQLite file beside the HTML pages.
+
+    A record is reused only while the page's mtime and size are unchanged and it was produced
+    by the same (namespace, version) parser, so bumping a parser's version invalidates it.
+    """
+    def __init__(self, html_folder, namespace, version, db_path=None):
+        self.namespace = namespace
+        self.version = str(version)
+        self.conn = sqlite3.connect(db_path or os.path.join(html_folder, CACHE_FILE))
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS records (
+            namespace TEXT, name TEXT, version TEXT, mtime_ns INTEGER, size INTEGER, record BLOB,
+            PRIMARY KEY (namespace, name))""")
+        self.pending = 0
+
+    def is_fresh(self, filepath, st):
+        row = self.conn.execute(
+            "SELECT version, mtime_ns, size FROM records WHERE namespace = ? AND name = ?",
+            (self.namespace, os.path.basename(filepath))).fetchone()
+        return row == (self.version, st.st_mtime_ns, st.st_size)
+
+    def load(self, filepath):
+        row = self.conn.execute(
+            "SELECT record FROM records WHERE namespace = ? AND name = ?",
+            (self.namespace, os.path.basename(filepath))).fetchone()
+        return pickle.loads(row[0])
+
+    def put(self, filepath, st, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, os.path.basename(filepath), self.version, st.st_mtime_ns, st.st_size,
+             pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)))
+        self.pending += 1
+        if self.pending >= 200: self.commit() # Keep progress if the run is interrupted
+
+    def prune(self, files):
+        """Evicts records for pages that no longer exist or were built by another parser version."""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS live (name TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM live")
+        self.conn.executemany("INSERT OR IGNORE INTO live VALUES (?)", [(os.path.basename(fp),) for fp in files])
+        self.conn.execute(
+            "DELETE FROM records WHERE namespace = ? AND (version != ? OR name NOT IN (SELECT name FROM live))",
+            (self.namespace, self.version))
+        self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+class FetchMeta:
+    """Per-URL HTTP validators for incremental page refreshes, stored in a SQLite file beside the HTML pages.
+
+    Each URL keeps its page file name, ETag, Last-Modified, a SHA-256 of the saved body and the
+    time it was last confirmed, so a refresh can send conditional requests and leave unchanged
+    pages (and their mtimes, which the ParseCache keys on) untouched.
+    """
+    def __init__(self, html_folder, db_path=None):
+        self.conn = sqlite3.connect(db_path or os.path.join(html_folder, META_FILE))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY, name TEXT, etag TEXT, last_modified TEXT, sha256 TEXT, fetched_at REAL)""")
+
+    def all(self):
+        return {row['url']: dict(row) for row in self.conn.execute("SELECT * FROM pages")}
+
+    def put(self, url, name, etag, last_modified, sha256, fetched_at):
+        self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                          (url, name, etag, last_modified, sha256, fetched_at))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
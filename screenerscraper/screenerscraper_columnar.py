@@ -0,0 +1,69 @@
+import os
+
+# Output format -> file extension. Both need the optional pyarrow package.
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+def to_float(value):
+    """Numeric cell -> float; blanks and text cells -> None (stored as null)."""
+    if value is None or value == "": return None
+    try: return float(value)
+    except (TypeError, ValueError): return None
+
+def columnar_path(path, fmt):
+    return os.path.splitext(path)[0] + COLUMNAR_FORMATS[fmt]
+
+class ColumnarWriter:
+    """Streams long-format rows into a typed Parquet / Arrow IPC file.
+
+    Label columns (sector, industry, company, section, metric...) are dictionary-encoded
+    and value columns are float64. Rows are buffered and flushed as record batches, so
+    memory stays bounded by batch_rows.
+    """
+    def __init__(self, out_file, label_columns, value_columns, fmt="parquet", batch_rows=50000):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Parquet/Arrow output needs pyarrow. Install it with 'pip install pyarrow'.")
+        if fmt not in COLUMNAR_FORMATS: raise ValueError(f"Unknown columnar format '{fmt}'. Choose from {list(COLUMNAR_FORMATS)}.")
+
+        self.pa = pa
+        self.out_file = out_file
+        self.batch_rows = batch_rows
+        self.schema = pa.schema(
+            [(c, pa.dictionary(pa.int32(), pa.string())) for c in label_columns] +
+            [(c, pa.float64()) for c in value_columns])
+        # One growing dictionary per label column: every batch only appends to it,
+        # which Arrow IPC files accept as dictionary deltas
+        self.dictionaries = [{} for _ in label_columns]
+        self.labels = [[] for _ in label_columns]
+        self.values = [[] for _ in value_columns]
+        self.rows = 0
+
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(out_file, self.schema)
+        else:
+            import pyarrow.ipc as ipc
+            self.writer = ipc.new_file(out_file, self.schema, options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def write_row(self, labels, values):
+        for col, d, label in zip(self.labels, self.dictionaries, labels):
+            col.append(d.setdefault(str(label), len(d)))
+        for col, value in zip(self.values, values):
+            col.append(to_float(value))
+        self.rows += 1
+        if self.rows >= self.batch_rows: self.flush()
+
+    def flush(self):
+        if not self.rows: return
+        pa = self.pa
+        arrays = [pa.DictionaryArray.from_arrays(pa.array(col, pa.int32()), pa.array(list(d), pa.string()))
+                  for col, d in zip(self.labels, self.dictionaries)]
+        arrays += [pa.array(col, pa.float64()) for col in self.values]
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        for col in self.labels + self.values: col.clear()
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
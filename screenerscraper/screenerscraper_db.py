@@ -0,0 +1,129 @@
+import os
+import sqlite3
+
+DB_FILE = "screener.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    company_id INTEGER PRIMARY KEY, name TEXT, bse_code TEXT, nse_symbol TEXT,
+    broad_sector TEXT, sector TEXT, broad_industry TEXT, industry TEXT,
+    UNIQUE (name, bse_code, nse_symbol));
+CREATE TABLE IF NOT EXISTS facts (
+    company_id INTEGER, section TEXT, metric TEXT, period TEXT, value REAL, raw TEXT,
+    PRIMARY KEY (company_id, section, metric, period)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_facts_metric ON facts (section, metric, period, value);
+CREATE INDEX IF NOT EXISTS idx_facts_period ON facts (period);
+CREATE INDEX IF NOT EXISTS idx_companies_industry ON companies (industry, sector);
+"""
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+class DatabaseSink:
+    """Loads every parsed company (all sections, not just the active metrics) into an indexed SQLite store.
+
+    A company is keyed by name + exchange codes; re-exporting it replaces its facts, so the
+    database always reflects the latest parse. Values are stored as REAL with the page text kept
+    alongside for anything non-numeric.
+    """
+    def __init__(self, db_path=DB_FILE, commit_every=200):
+        self.db_path = db_path
+        self.commit_every = commit_every
+
+    def open(self):
+        self.conn = connect(self.db_path)
+        self.pending = 0
+
+    def write(self, d, base_info):
+        stat = d.header
+        key = (stat['Company Name'], stat['BSE Code'], stat['NSE Symbol'])
+        self.conn.execute("""INSERT INTO companies (name, bse_code, nse_symbol, broad_sector, sector, broad_industry, industry)
+            VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (name, bse_code, nse_symbol) DO UPDATE SET
+            broad_sector = excluded.broad_sector, sector = excluded.sector, broad_industry = excluded.broad_industry, industry = excluded.industry""",
+            key + (stat['Broad Sector'], stat['Sector'], stat['Broad Industry'], stat['Industry']))
+        company_id = self.conn.execute("SELECT company_id FROM companies WHERE name = ? AND bse_code = ? AND nse_symbol = ?", key).fetchone()[0]
+        self.conn.execute("DELETE FROM facts WHERE company_id = ?", (company_id,))
+        self.conn.executemany("INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?, ?, ?)",
+            [(company_id, section, metric, period, value, raw)
+             for section, block in d.sections
+             for metric, period, value, raw in block.cells()])
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.execute("ANALYZE") # Lets the planner pick the metric index for the playground's filters
+        self.conn.close()
+
+class CompanyDB:
+    """Read side of the store for the Data Playground: catalogue lookups plus filtered and grouped queries."""
+    def __init__(self, db_path=DB_FILE):
+        self.conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, check_same_thread=False)
+
+    def _column(self, sql, params=()):
+        return [r[0] for r in self.conn.execute(sql, params)]
+
+    def sections(self):
+        return self._column("SELECT DISTINCT section FROM facts ORDER BY section")
+
+    def metrics(self, section):
+        return self._column("SELECT DISTINCT metric FROM facts WHERE section = ? ORDER BY metric", (section,))
+
+    def periods(self, section, metric):
+        # Newest first: 'Mar 2024' sorts by year, then by month
+        periods = self._column("SELECT DISTINCT period FROM facts WHERE section = ? AND metric = ?", (section, metric))
+        months = {m: i for i, m in enumerate(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])}
+        def key(p):
+            parts = p.split()
+            if len(parts) == 2 and parts[0] in months and parts[1].isdigit(): return (0, -int(parts[1]), -months[parts[0]])
+            return (-1, 0, 0) # TTM / Static first
+        return sorted(periods, key=key)
+
+    def industries(self):
+        return self._column("SELECT DISTINCT industry FROM companies ORDER BY industry")
+
+    def _where(self, section, metric, periods=None, industries=None, min_value=None, max_value=None):
+        clauses, params = ["f.section = ?", "f.metric = ?"], [section, metric]
+        if periods:
+            clauses.append(f"f.period IN ({','.join('?' * len(periods))})")
+            params += list(periods)
+        if industries:
+            clauses.append(f"c.industry IN ({','.join('?' * len(industries))})")
+            params += list(industries)
+        if min_value is not None:
+            clauses.append("f.value >= ?")
+            params.append(min_value)
+        if max_value is not None:
+            clauses.append("f.value <= ?")
+            params.append(max_value)
+        return " AND ".join(clauses), params
+
+    def query(self, section, metric, periods=None, industries=None, min_value=None, max_value=None):
+        """One row per company, one column per period (long facts pivoted in pandas)."""
+        import pandas as pd
+        where, params = self._where(section, metric, periods, industries, min_value, max_value)
+        df = pd.read_sql_query(f"""SELECT c.name AS "Company Name", c.nse_symbol AS "NSE Symbol", c.sector AS "Sector",
+            c.industry AS "Industry", f.period AS period, f.value AS value
+            FROM facts f JOIN companies c USING (company_id) WHERE {where}""", self.conn, params=params)
+        if df.empty: return df
+        wide = df.pivot_table(index=["Company Name", "NSE Symbol", "Sector", "Industry"], columns="period", values="value", aggfunc="first")
+        ordered = [p for p in self.periods(section, metric) if p in wide.columns]
+        return wide[ordered].rename_axis(columns=None).reset_index()
+
+    def aggregate(self, section, metric, period, by="industry", industries=None):
+        """Count / mean / median / min / max of one metric-period per sector or industry."""
+        import pandas as pd
+        if by not in ("industry", "sector", "broad_sector", "broad_industry"): raise ValueError(f"Cannot group by '{by}'.")
+        where, params = self._where(section, metric, [period], industries)
+        df = pd.read_sql_query(f"SELECT c.{by} AS grp, f.value AS value FROM facts f JOIN companies c USING (company_id) WHERE {where} AND f.value IS NOT NULL",
+                               self.conn, params=params)
+        if df.empty: return df
+        out = df.groupby("grp")["value"].agg(["count", "mean", "median", "min", "max"]).reset_index()
+        return out.rename(columns={"grp": by.replace('_', ' ').title()}).sort_values("count", ascending=False)
+
+    def close(self):
+        self.conn.close()
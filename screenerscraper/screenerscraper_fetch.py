@@ -0,0 +1,45 @@
+import time
+import asyncio
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from screenerscraper_http import HttpClient, DEFAULT_CONCURRENCY
+
+async def fetch_all(urls, on_result, concurrency=DEFAULT_CONCURRENCY, client=None, headers_for=None):
+    """Fetches every URL through an HttpClient with at most `concurrency` requests in flight.
+
+    The client supplies pooling, the per-host rate limit, retries and metrics. on_result(index,
+    url, response, error) is called on the event loop as each URL finishes: `response` is the
+    final requests.Response (any status) or None with `error` set. headers_for(url) may add
+    per-request headers (e.g. conditional validators). Returns {"ok", "failed", "retries", "elapsed"}.
+    """
+    own_client = client is None
+    client = client or HttpClient(pool_size=concurrency)
+    queue = asyncio.Queue()
+    for item in enumerate(urls): queue.put_nowait(item)
+    stats = {"ok": 0, "failed": 0}
+    retries_before = client.metrics.total_retries()
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+
+    async def worker(pool):
+        while True:
+            try: idx, url = queue.get_nowait()
+            except asyncio.QueueEmpty: return
+            headers = headers_for(url) if headers_for else None
+            try: res, error = await loop.run_in_executor(pool, lambda: client.get(url, headers=headers)), None
+            except requests.RequestException as e: res, error = None, str(e)
+            stats["ok" if res is not None and res.ok else "failed"] += 1
+            on_result(idx, url, res, error)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            await asyncio.gather(*(worker(pool) for _ in range(concurrency)))
+    finally:
+        if own_client: client.close()
+    stats["retries"] = client.metrics.total_retries() - retries_before
+    stats["elapsed"] = time.monotonic() - started
+    return stats
+
+def fetch_urls(urls, on_result, **kwargs):
+    """Blocking wrapper around fetch_all() for the scripts and the Streamlit app."""
+    return asyncio.run(fetch_all(urls, on_result, **kwargs))
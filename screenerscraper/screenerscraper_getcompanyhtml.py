@@ -1,14 +1,31 @@
 import os
-import requests
-import time
-import random
 import csv
+import time
 import shutil
+import hashlib
 from datetime import datetime
+from screenerscraper_fetch import fetch_urls
+from screenerscraper_http import HttpClient, DEFAULT_CONCURRENCY, DEFAULT_RATE, is_transient
+from screenerscraper_cache import FetchMeta
+from screenerscraper_store import write_html, find_page, is_html_file, page_stem
+from screenerscraper_jobs import JobStore, JOBS_FILE, RETRY_BASE
 
-HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+def page_name(url):
+    return url.split("/company/")[1].split('/')[0] if "/company/" in url else "unknown"
 
-def run_html_scraper(file_path, folder_path, folder_action):
+def conditional_headers(meta):
+    headers = {}
+    if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+def run_html_scraper(file_path, folder_path, folder_action, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, max_age_hours=None, compress=None, retry_base=RETRY_BASE):
+    """folder_action: '1' wipe the folder, '3' keep existing pages and save duplicates as NAME_2...,
+    '4' incremental refresh (conditional requests; pages confirmed within max_age_hours are not
+    requested at all and unchanged pages are never rewritten). Anything else overwrites in place.
+    compress=True stores pages as NAME.html.gz (default: $SCREENER_COMPRESS_HTML). Progress lives in a
+    JobStore, so an interrupted run picks up where it stopped and failed pages are retried with backoff
+    (429s, 5xx and connection errors only; a 404 or other 4xx is final)."""
     print("\n--- Starting HTML Scraper ---")
     if not os.path.exists(file_path): return print(f"File '{file_path}' does not exist.")
     
@@ -20,36 +37,100 @@ def run_html_scraper(file_path, folder_path, folder_action):
             next(reader, None)
             urls = [row[0] for row in reader if row]
 
-    if not os.path.exists(folder_path): os.makedirs(folder_path)
+    # An unfinished job for this link file is resumed as-is (no wipe, same file names)
+    os.makedirs(folder_path, exist_ok=True)
+    jobs = JobStore(folder_path, f"html:{os.path.abspath(file_path)}", retry_base=retry_base)
+    resuming = jobs.exists()
+    if resuming: print(f"Resuming unfinished job: {jobs.counts()}")
     elif folder_action == '1':
         for filename in os.listdir(folder_path):
+            if filename == JOBS_FILE: continue
             p = os.path.join(folder_path, filename)
             os.unlink(p) if os.path.isfile(p) else shutil.rmtree(p)
 
-    existing = set(os.listdir(folder_path)) if folder_action == '3' else set()
-    results_log, failed = [], []
+    incremental = folder_action == '4'
+    meta = FetchMeta(folder_path) if incremental else None
+    known = meta.all() if incremental else {}
+
+    # A resumed job keeps its queued names; links added to the file since then are named and queued too
+    queued = {url: name for url, name, _, _ in jobs.results()}
+    existing = {page_stem(f) for f in os.listdir(folder_path) if is_html_file(f)} if folder_action == '3' else set()
+    taken = {m['name']: u for u, m in known.items()}
+    taken.update({name: url for url, name in queued.items()})
 
-    for idx, url in enumerate(urls):
-        print(f"[{idx+1}/{len(urls)}] Fetching {url}...")
-        company = url.split("/company/")[1].split('/')[0] if "/company/" in url else "unknown"
+    # File names are settled up front so they don't depend on which request finishes first
+    names = []
+    for url in urls:
+        if url in queued or url in known:
+            names.append(queued[url] if url in queued else known[url]['name'])
+            continue
+        company = page_name(url)
         counter = 1
-        while f"{company}.html" in existing:
+        while company in existing or taken.get(company, url) != url:
             counter += 1
             company = f"{company.split('_')[0]}_{counter}"
-            
-        try:
-            res = requests.get(url, headers=HEADERS, timeout=10)
-            if res.status_code == 200:
-                with open(os.path.join(folder_path, f"{company}.html"), 'w', encoding='utf-8') as f:
-                    f.write(res.text)
-                results_log.append((url, "SUCCESS"))
-            else: raise Exception("Bad Status")
-        except:
-            results_log.append((url, "FAILED"))
-            failed.append(url)
-
-        if (idx + 1) % 4 == 0 and (idx + 1) < len(urls):
-            time.sleep(random.uniform(2, 5))
+        if incremental: taken[company] = url
+        names.append(company)
+    jobs.add(zip(urls, names)) # INSERT OR IGNORE: items already in the job keep their state
+
+    # Only pages whose saved copy is still on disk can be revalidated or skipped
+    current = {u: m for u, m in known.items() if find_page(folder_path, m['name'])}
+    if incremental and max_age_hours is not None:
+        cutoff = time.time() - max_age_hours * 3600
+        fresh = [url for url, _ in jobs.due() if url in current and current[url]['fetched_at'] >= cutoff]
+        for url in fresh: jobs.done(url, "FRESH")
+        print(f"{len(fresh)} pages within max age.")
+
+    def save(url, name, res, error):
+        status = None
+        if res is not None and res.status_code == 304 and url in current:
+            status = "NOT MODIFIED"
+            old = current[url]
+            meta.put(url, name, res.headers.get('ETag') or old['etag'], res.headers.get('Last-Modified') or old['last_modified'], old['sha256'], time.time())
+        elif res is not None and res.status_code == 200:
+            text = res.text
+            digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if incremental and url in current and current[url]['sha256'] == digest:
+                status = "UNCHANGED" # Leaves the mtime alone so the parse cache keeps its record
+            else:
+                write_html(folder_path, name, text, compress)
+                status = "SUCCESS"
+            if incremental: meta.put(url, name, res.headers.get('ETag'), res.headers.get('Last-Modified'), digest, time.time())
+        if status:
+            jobs.done(url, status)
+            if meta: meta.commit()
+        else: jobs.failed(url, error or f"HTTP {res.status_code}", transient=is_transient(None if res is None else res.status_code))
+        return status or "FAILED"
+
+    headers_for = (lambda url: conditional_headers(current[url]) if url in current else None) if incremental else None
+    totals = {"ok": 0, "retries": 0, "elapsed": 0.0}
+    client = HttpClient(rate=rate, pool_size=concurrency)
+    try:
+        # Each round fetches whatever is due; failures back off individually and are retried in later rounds
+        while True:
+            due = jobs.due()
+            if due:
+                done = [0]
+                def on_result(i, url, res, error):
+                    done[0] += 1
+                    print(f"[{done[0]}/{len(due)}] {save(url, due[i][1], res, error).title()} {url}")
+                stats = fetch_urls([url for url, _ in due], on_result, concurrency=concurrency, client=client, headers_for=headers_for)
+                for k in totals: totals[k] += stats[k]
+            if not jobs.wait_for_retry(): break
+        results = {url: (status, result) for url, _, status, result in jobs.results()}
+        jobs.clear()
+    finally:
+        jobs.close()
+        if meta: meta.close()
+        client.close()
+        client.metrics.save()
+
+    statuses = [results[u][1] if results[u][0] == 'done' else "FAILED" for u in urls]
+    print(f"Fetched {totals['ok']} pages in {totals['elapsed']:.1f}s ({totals['retries']} retries).")
+    print(client.metrics.summary())
+    if incremental: print(f"Rewrote {statuses.count('SUCCESS')} changed pages, {statuses.count('NOT MODIFIED') + statuses.count('UNCHANGED')} unchanged.")
+    results_log = list(zip(urls, statuses))
+    failed = [u for u, s in results_log if s == "FAILED"]
 
     log_path = os.path.join(os.path.dirname(file_path), f"screenerlinks-{datetime.now().strftime('%Y-%m-%d')}.txt")
     with open(log_path, 'w') as f:
@@ -1,65 +1,110 @@
-import requests
 from bs4 import BeautifulSoup
-import time
-import random
 import os
+import re
 import csv
+import json
+from screenerscraper_jobs import JobStore
+from screenerscraper_fetch import fetch_urls
+from screenerscraper_http import HttpClient, DEFAULT_CONCURRENCY, DEFAULT_RATE, is_transient
 
-HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+def screen_base_url(screener_url):
+    """Normalizes 'https://...', 'screener.in/...' or a bare screen path to 'https://.../' without ?page=."""
+    if screener_url.startswith("http"): base_url = screener_url
+    elif screener_url.startswith("screener.in"): base_url = "https://" + screener_url
+    else: base_url = "https://screener.in/screens/" + screener_url
+
+    if "?page=" in base_url: base_url = base_url.split("?page=")[0]
+    if not base_url.endswith("/"): base_url += "/"
+    return base_url
 
-def get_total_pages(base_url):
-    response = requests.get(base_url, headers=HEADERS)
-    if response.status_code != 200: return 1
-    soup = BeautifulSoup(response.content, 'html.parser')
+def get_total_pages(soup):
     pagination = soup.find('div', class_='pagination')
     if pagination:
         total_pages = [int(a.text) for a in pagination.find_all('a') if a.text.isdigit()]
         return max(total_pages) if total_pages else 1
     return 1
 
-def get_company_urls_from_page(url):
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 429:
-        time.sleep(random.uniform(3, 5))
-        response = requests.get(url, headers=HEADERS)
-    if response.status_code != 200: return []
-    soup = BeautifulSoup(response.content, 'html.parser')
+def get_company_urls_from_page(soup):
     return [f"https://www.screener.in{a['href']}" for a in soup.find_all('a', href=True) if a['href'].startswith("/company/")]
 
-def run_url_scraper(screener_url, max_pages_input, file_format, folder_path):
-    print("\n--- Starting URL Scraper ---")
-    if screener_url.startswith("http"): base_url = screener_url
-    elif screener_url.startswith("screener.in"): base_url = "https://" + screener_url
-    else: base_url = "https://screener.in/screens/" + screener_url
+def page_soup(res):
+    # None for a failed page, as opposed to a page with no companies
+    return BeautifulSoup(res.content, 'html.parser') if res is not None and res.status_code == 200 else None
 
-    if "?page=" in base_url: base_url = base_url.split("?page=")[0]
-    if not base_url.endswith("/"): base_url += "/"
-    base_url_with_page = base_url + "?page="
+def run_url_scraper(screener_url, max_pages_input, file_format, folder_path, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
+    """Collects the company links of one or more screens (a list, or a comma/space separated string).
 
-    total_pages = get_total_pages(base_url_with_page + "1")
-    try:
-        max_pages = int(max_pages_input) if max_pages_input else total_pages
-        max_pages = min(max_pages, total_pages)
-    except ValueError: max_pages = total_pages
+    Pages are fetched concurrently within the rate budget, links are de-duplicated across every
+    screen as they arrive, and the output file is written incrementally in page order.
+    """
+    print("\n--- Starting URL Scraper ---")
+    screens = screener_url if isinstance(screener_url, (list, tuple)) else re.split(r'[,\s]+', screener_url.strip())
+    bases = list(dict.fromkeys(screen_base_url(s) for s in screens if s))
+    try: max_pages = int(max_pages_input) if max_pages_input else None
+    except ValueError: max_pages = None
 
     os.makedirs(folder_path, exist_ok=True)
-    file_name = base_url.strip('/').split('/')[-1] + ('.txt' if file_format == 'txt' else '.csv')
+    file_name = "-".join(b.strip('/').split('/')[-1] for b in bases) + ('.txt' if file_format == 'txt' else '.csv')
     output_file_path = os.path.join(folder_path, file_name)
 
-    all_urls = []
-    for page in range(1, max_pages + 1):
-        print(f"Processing page {page}/{max_pages}...")
-        urls = get_company_urls_from_page(base_url_with_page + str(page))
-        all_urls.extend(urls)
-        time.sleep(random.uniform(3, 5))
-
-    if file_format == 'txt':
-        with open(output_file_path, 'w') as file:
-            for url in all_urls: file.write(f"{url}\n")
-    else:
-        with open(output_file_path, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['URL'])
-            for url in all_urls: writer.writerow([url])
-            
-    print(f"Collected {len(all_urls)} URLs. Saved to '{output_file_path}'")
\ No newline at end of file
+    # Page results are checkpointed, so an interrupted crawl only fetches the pages it is missing
+    jobs = JobStore(folder_path, "urls:" + " ".join(bases))
+    client = HttpClient(rate=rate, pool_size=concurrency)
+    try:
+        if jobs.exists(): print(f"Resuming unfinished crawl: {jobs.counts()}")
+        else:
+            # Page 1 of every screen gives its page count and already holds its first companies
+            first = {}
+            fetch_urls([b + "?page=1" for b in bases], lambda i, url, res, error: first.__setitem__(i, page_soup(res)),
+                       concurrency=concurrency, client=client)
+            for i, base in enumerate(bases):
+                total_pages = get_total_pages(first[i]) if first.get(i) else 1
+                pages = min(max_pages, total_pages) if max_pages else total_pages
+                jobs.add((f"{base}?page={page}", base) for page in range(1, pages + 1))
+                if first.get(i): jobs.done(base + "?page=1", json.dumps(get_company_urls_from_page(first[i])))
+            print(f"Queued {sum(jobs.counts().values())} pages across {len(bases)} screen(s).")
+
+        order = [page for page, *_ in jobs.results()]
+        found = {page: json.loads(result) for page, _, status, result in jobs.results() if status == 'done'}
+        seen, written = set(), [0]
+
+        with open(output_file_path, 'w', newline=None if file_format == 'txt' else '') as file:
+            writer = None if file_format == 'txt' else csv.writer(file)
+            if writer: writer.writerow(['URL'])
+
+            def flush(final=False):
+                # Pages are written as soon as every page before them is in; failed pages are only skipped at the end
+                while written[0] < len(order) and (order[written[0]] in found or final):
+                    for url in found.get(order[written[0]], []):
+                        if url in seen: continue
+                        seen.add(url)
+                        if writer: writer.writerow([url])
+                        else: file.write(f"{url}\n")
+                    written[0] += 1
+                file.flush()
+
+            def on_result(i, url, res, error):
+                soup = page_soup(res)
+                if soup is None: return jobs.failed(url, error or f"HTTP {res.status_code}", transient=is_transient(None if res is None else res.status_code))
+                found[url] = get_company_urls_from_page(soup)
+                jobs.done(url, json.dumps(found[url]))
+                print(f"Processed {url} ({len(found)}/{len(order)} pages)")
+                flush()
+
+            flush()
+            while True:
+                due = jobs.due()
+                if due: fetch_urls([page for page, _ in due], on_result, concurrency=concurrency, client=client)
+                if not jobs.wait_for_retry(): break
+            flush(final=True)
+
+        failed_pages = [page for page in order if page not in found]
+        jobs.clear()
+    finally:
+        client.close()
+        client.metrics.save()
+        jobs.close()
+    if failed_pages: print(f"Gave up on {len(failed_pages)} page(s): {', '.join(failed_pages)}")
+
+    print(client.metrics.summary())
+    print(f"Collected {len(seen)} unique URLs. Saved to '{output_file_path}'")
@@ -1,15 +1,93 @@
 import os
 import requests
 import time
-import random
 import csv
+from collections import deque
+from contextlib import suppress
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from screenerscraper_jobs import JobStore, RETRY_BASE
+from screenerscraper_http import HttpClient, RETRY_STATUSES, is_transient
+
+EXCEL_MAX_CONCURRENCY = 6
+# Requests/second. Downloads start at the old batch-and-pause pace (25 files, ~4 s apart, then a
+# 5 minute pause: about 4 files/min) and the AIMD window climbs towards the ceiling while healthy
+EXCEL_START_RATE = 4 / 60
+EXCEL_MAX_RATE = 0.5
+RATE_STEPS = 8 # Additive increase: a healthy window wins back 1/RATE_STEPS of the ceiling
+MIN_RATE_FRACTION = 1 / 16 # Multiplicative decrease never goes below this share of the ceiling
+CHUNK_SIZE = 1 << 16
+REPORT_EVERY = 10
+EXCEL_URL = "https://www.screener.in/excel/{cid}/"
 
 def extract_id(url):
     try: return url.split("/company/")[1].strip('/').split('/')[0]
     except: return None
 
-def run_excel_scraper(file_path, folder_path, session_cookie, batch_size=25, pause_mins=5):
-    print("\n--- Starting Excel Batch Downloader ---")
+class AIMDWindow:
+    """Adaptive pacing for one host: grows after a full window of healthy responses, halved on 429/5xx or a dropped connection.
+
+    It drives both how many downloads are in flight (`size`, up to `maximum`) and the request rate
+    of the host's limiter (`rate`, between max_rate * MIN_RATE_FRACTION and max_rate), so backing
+    off really slows the requests down rather than just queueing them behind the token bucket.
+    The limiter's current rate is the starting point; max_rate defaults to it.
+    """
+    def __init__(self, maximum, limiter, max_rate=None, start=1):
+        self.maximum = maximum
+        self.size = min(start, maximum)
+        self.healthy = 0
+        self.limiter = limiter
+        self.max_rate = max(max_rate or 0.0, limiter.rate)
+        self.rate = limiter.rate
+
+    def _set_rate(self, rate):
+        self.rate = min(self.max_rate, max(self.max_rate * MIN_RATE_FRACTION, rate))
+        self.limiter.set_rate(self.rate)
+
+    def record(self, throttled):
+        if throttled:
+            self.size = max(1, self.size // 2)
+            self._set_rate(self.rate / 2)
+            self.healthy = 0
+            return
+        self.healthy += 1
+        if self.healthy >= self.size and (self.size < self.maximum or self.rate < self.max_rate):
+            self.size = min(self.size + 1, self.maximum)
+            self._set_rate(self.rate + self.max_rate / RATE_STEPS)
+            self.healthy = 0
+
+def download_excel(client, cid, folder_path, cookies):
+    """Streams one export to CID.xlsx.part and renames it into place. Returns (status code, bytes written)."""
+    url = EXCEL_URL.format(cid=cid)
+    res = client.get(url, cookies=cookies, stream=True)
+    try:
+        if res.status_code != 200: return res.status_code, 0
+        path = os.path.join(folder_path, f"{cid}.xlsx")
+        written = 0
+        try:
+            with open(path + ".part", 'wb') as f:
+                for chunk in res.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+            os.replace(path + ".part", path) # A half-written file never looks like a finished download
+        except BaseException:
+            with suppress(OSError): os.remove(path + ".part")
+            raise
+        client.metrics.add_bytes(urlsplit(url).netloc, written)
+        return 200, written
+    finally:
+        res.close()
+
+def run_excel_scraper(file_path, folder_path, session_cookie, max_concurrency=EXCEL_MAX_CONCURRENCY, rate=EXCEL_START_RATE,
+                      max_rate=EXCEL_MAX_RATE, retry_base=RETRY_BASE):
+    """Downloads every company's Excel export with an AIMD-paced pool of workers.
+
+    Requests start at `rate` (requests/second, by default the old downloader's ~4 files/min) with one
+    download in flight. While responses are healthy both the concurrency and the rate grow, up to
+    `max_concurrency` and `max_rate`; a 429/5xx halves both, and they climb back from there. A failed item goes back to the job store to be retried after its own backoff,
+    unless the answer was a 404 or another 4xx that a retry would only repeat.
+    """
+    print("\n--- Starting Excel Downloader ---")
     urls = []
     with open(file_path, 'r', encoding='utf-8') as file:
         if file_path.endswith('.txt'): urls = [line.strip() for line in file if line.strip()]
@@ -19,43 +97,68 @@ def run_excel_scraper(file_path, folder_path, session_cookie, batch_size=25, pau
             urls = [row[0] for row in reader if row]
 
     os.makedirs(folder_path, exist_ok=True)
-    headers = {'User-Agent': 'Mozilla/5.0', 'Referer': 'https://www.screener.in/'}
+    # No client-side retries: every throttle response has to reach the AIMD window
+    client = HttpClient(rate=rate, burst=1, pool_size=max_concurrency, max_retries=0, timeout=15,
+                        headers={'User-Agent': 'Mozilla/5.0', 'Referer': 'https://www.screener.in/'})
     cookies = {'sessionid': session_cookie}
 
-    # Safe Loop instead of Recursion
-    while True:
-        existing = set(os.listdir(folder_path))
-        pending = [(u, extract_id(u)) for u in urls if extract_id(u) and f"{extract_id(u)}.xlsx" not in existing]
-        
-        if not pending: 
-            print("Success: All companies downloaded!")
-            break
-
-        batch = pending[:batch_size]
-        print(f"Found {len(pending)} pending. Processing batch of {len(batch)}...")
-
-        dl, failed = 0, 0
-        for url, cid in batch:
-            try:
-                res = requests.get(f"https://www.screener.in/excel/{cid}/", headers=headers, cookies=cookies, timeout=15)
-                if res.status_code == 200:
-                    with open(os.path.join(folder_path, f"{cid}.xlsx"), 'wb') as f: f.write(res.content)
-                    dl += 1
-                    print(f"Grabbed: {cid}")
-                    time.sleep(random.uniform(2.5, 5.0))
-                else:
-                    failed += 1
-                    time.sleep(1.5)
-            except:
-                failed += 1
-                time.sleep(2.0)
-
-        print(f"\nBatch Summary: {dl} downloaded, {failed} failed.")
-
-        if len(pending) > batch_size:
-            print(f"Pausing for {pause_mins} minutes to avoid rate limits...")
-            for _ in range(pause_mins * 60):
-                time.sleep(1) # Allows clean interruption
-        else:
-            print("All batches complete!")
-            break
\ No newline at end of file
+    # One job item per company id; the folder is listed once and anything already on disk counts as done
+    jobs = JobStore(folder_path, f"excel:{os.path.abspath(file_path)}", retry_base=retry_base)
+    ids = {}
+    for u in urls:
+        cid = extract_id(u)
+        if cid: ids.setdefault(cid, u)
+    jobs.add(ids.items())
+    existing = set(os.listdir(folder_path))
+    for cid, _ in jobs.due():
+        if f"{cid}.xlsx" in existing: jobs.done(cid, "EXISTING")
+
+    window = AIMDWindow(max_concurrency, client.limiter(urlsplit(EXCEL_URL).netloc), max_rate)
+    total = sum(1 for _, _, status, _ in jobs.results() if status != 'done')
+    started, done, nbytes = time.monotonic(), 0, 0
+    def report():
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(f"[{done}/{total}] window {window.size} @ {window.rate * 60:.1f} req/min | {done / elapsed * 60:.1f} files/min | {nbytes / elapsed / 1e6:.2f} MB/s")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            while True:
+                queue, in_flight = deque(cid for cid, _ in jobs.due()), {}
+                while queue or in_flight:
+                    while queue and len(in_flight) < window.size:
+                        cid = queue.popleft()
+                        in_flight[pool.submit(download_excel, client, cid, folder_path, cookies)] = cid
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    # Results are recorded here on the main thread, which owns the job store
+                    for fut in finished:
+                        cid = in_flight.pop(fut)
+                        try:
+                            status, size = fut.result()
+                            error = None if status == 200 else f"HTTP {status}"
+                            throttled, transient = status in RETRY_STATUSES, is_transient(status)
+                        except requests.RequestException as e:
+                            error, throttled, transient = str(e), True, True
+                        except Exception as e:
+                            # e.g. a full disk while writing CID.xlsx.part: that company fails, the batch carries on
+                            error, throttled, transient = f"{type(e).__name__}: {e}", False, True
+                        window.record(throttled)
+                        if error:
+                            jobs.failed(cid, error, transient=transient)
+                            print(f"Failed: {cid} ({error})")
+                            continue
+                        jobs.done(cid, "DOWNLOADED")
+                        done, nbytes = done + 1, nbytes + size
+                        print(f"Grabbed: {cid}")
+                        if done % REPORT_EVERY == 0: report()
+                if not jobs.wait_for_retry(): break
+        if done % REPORT_EVERY: report()
+
+        gave_up = [cid for cid, _, status, _ in jobs.results() if status != 'done']
+        jobs.clear()
+    finally:
+        jobs.close()
+        client.close()
+        client.metrics.save()
+    print(client.metrics.summary())
+    if gave_up: print(f"Gave up on {len(gave_up)} companies: {', '.join(gave_up)}")
+    else: print("Success: All companies downloaded!")
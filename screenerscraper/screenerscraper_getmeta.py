@@ -0,0 +1,81 @@
+import os
+import json
+from screenerscraper_pool import iter_parsed
+from screenerscraper_cache import ParseCache
+from screenerscraper_backend import read_soup, parser_signature, page_targets
+from screenerscraper_store import list_html_files
+from screenerscraper_getmetrics import metrics_from_soup
+from screenerscraper_getsectors import sectors_from_soup
+
+# Bump whenever scan_meta's output changes so cached scans are rebuilt
+SCAN_VERSION = 1
+SECTOR_KEYS = ("Broad Sector", "Sector", "Broad Industry", "Industry")
+
+def scan_meta(filepath):
+    """One parse per page for both JSONs: ((Section, Metric) pairs, sector classification)."""
+    soup = read_soup(filepath, targets=page_targets())
+    # Sectors first: metrics_from_soup decomposes parts of the tree as it goes
+    sectors = sectors_from_soup(soup)
+    return metrics_from_soup(soup), sectors
+
+def load_json_list(path):
+    if not os.path.exists(path): return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f) or []
+    except (OSError, ValueError):
+        return []
+
+def merge_metrics(existing, found):
+    """Existing rows keep their Active flag (and any hand-added rows survive); new pairs come in active."""
+    rows = {(m["Section"], m["Metric"]): m for m in existing}
+    new = 0
+    for section_name, metric_name in found:
+        if (section_name, metric_name) in rows: continue
+        rows[(section_name, metric_name)] = {"Section": section_name, "Metric": metric_name, "Source": "HTML", "Active": True}
+        new += 1
+    return sorted(rows.values(), key=lambda x: (x['Section'], x['Metric'])), new
+
+def merge_sectors(existing, found):
+    """Same as merge_metrics, keyed by the full classification; new industries are appended in discovery order."""
+    rows = list(existing)
+    seen = {tuple(s.get(k) for k in SECTOR_KEYS) for s in rows}
+    new = 0
+    for classification in found:
+        if classification[3] == "Unknown" or classification in seen: continue
+        seen.add(classification)
+        rows.append(dict(zip(SECTOR_KEYS, classification), Active=True))
+        new += 1
+    return rows, new
+
+def generate_meta_jsons(html_dir, metrics_path, sectors_path, workers=None, use_cache=True):
+    """Builds metrics.json and sectors.json from a single parallel pass over the pages.
+
+    With the cache only new or modified pages are parsed; results are merged into the existing
+    JSONs so entries a user switched off stay switched off.
+    """
+    print("\n--- Scanning HTML for Metrics & Sector Classifications ---")
+    html_files = list_html_files(html_dir)
+    if not html_files:
+        return False, "Error: No HTML files found in the directory."
+
+    metrics_found, sectors_found = {}, {}
+    cache = ParseCache(html_dir, "scan_meta", f"{SCAN_VERSION}-{parser_signature()}") if use_cache else None
+    try:
+        for _, found in iter_parsed(html_files, scan_meta, workers, cache):
+            if not found: continue
+            # dicts as ordered sets: first-seen order, like the separate scans
+            metrics_found.update(dict.fromkeys(found[0]))
+            sectors_found[tuple(found[1])] = None
+    finally:
+        if cache: cache.close()
+
+    metrics, new_metrics = merge_metrics(load_json_list(metrics_path), metrics_found)
+    sectors, new_sectors = merge_sectors(load_json_list(sectors_path), sectors_found)
+    for path, rows in ((metrics_path, metrics), (sectors_path, sectors)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4)
+
+    return True, (f"Success: {len(metrics)} metrics ({new_metrics} new) and {len(sectors)} industries "
+                  f"({new_sectors} new) from {len(html_files)} pages.")
@@ -1,32 +1,46 @@
 import os
 import json
-from bs4 import BeautifulSoup
+from screenerscraper_pool import iter_parsed
+from screenerscraper_cache import ParseCache
+from screenerscraper_backend import read_soup, parser_signature, PEERS_TARGET
+from screenerscraper_store import list_html_files
 
-def generate_sectors_json(html_dir, out_path):
+# Bump whenever scan_sectors' output changes so cached scans are rebuilt
+SCAN_VERSION = 1
+
+def scan_sectors(filepath):
+    """Returns the (Broad Sector, Sector, Broad Industry, Industry) classification of one page."""
+    return sectors_from_soup(read_soup(filepath, targets=PEERS_TARGET))
+
+def sectors_from_soup(soup):
+    peers = soup.find('section', id='peers')
+    if not peers: return ("Unknown", "Unknown", "Unknown", "Unknown")
+
+    b_sec = peers.find('a', title='Broad Sector')
+    sec = peers.find('a', title='Sector')
+    b_ind = peers.find('a', title='Broad Industry')
+    ind = peers.find('a', title='Industry')
+    
+    b_sec_t = b_sec.text.strip() if b_sec else "Unknown"
+    sec_t = sec.text.strip() if sec else "Unknown"
+    b_ind_t = b_ind.text.strip() if b_ind else "Unknown"
+    ind_t = ind.text.strip() if ind else "Unknown"
+    return (b_sec_t, sec_t, b_ind_t, ind_t)
+
+def generate_sectors_json(html_dir, out_path, workers=None, use_cache=True):
     print("\n--- Scanning HTML for Sector Classifications ---")
     sectors_set = set()
     sectors_output = []
     
-    html_files = [f for f in os.listdir(html_dir) if f.endswith('.html')]
+    html_files = list_html_files(html_dir)
     if not html_files:
         return False, "Error: No HTML files found in the directory."
 
-    for filename in html_files:
-        filepath = os.path.join(html_dir, filename)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-            
-        peers = soup.find('section', id='peers')
-        if peers:
-            b_sec = peers.find('a', title='Broad Sector')
-            sec = peers.find('a', title='Sector')
-            b_ind = peers.find('a', title='Broad Industry')
-            ind = peers.find('a', title='Industry')
-            
-            b_sec_t = b_sec.text.strip() if b_sec else "Unknown"
-            sec_t = sec.text.strip() if sec else "Unknown"
-            b_ind_t = b_ind.text.strip() if b_ind else "Unknown"
-            ind_t = ind.text.strip() if ind else "Unknown"
+    cache = ParseCache(html_dir, "scan_sectors", f"{SCAN_VERSION}-{parser_signature()}") if use_cache else None
+    try:
+        for _, found in iter_parsed(html_files, scan_sectors, workers, cache):
+            if not found: continue
+            b_sec_t, sec_t, b_ind_t, ind_t = found
             
             # Use Industry as the unique identifier key
             if ind_t != "Unknown":
@@ -40,6 +54,8 @@ def generate_sectors_json(html_dir, out_path):
                         "Industry": ind_t,
                         "Active": True
                     })
+    finally:
+        if cache: cache.close()
 
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, 'w', encoding='utf-8') as f:
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+import requests
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+
+# Politeness budget per host: the rate limiter caps requests, concurrency only hides latency
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 1.0 # requests per second to any one host
+DEFAULT_BURST = 4
+MAX_RETRIES = 4
+BACKOFF_BASE, BACKOFF_CAP = 2.0, 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Snapshot the Streamlit app reads; lives beside the backend scripts so CLI runs and the app agree on it
+METRICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screener_http_metrics.json")
+LATENCY_SAMPLES = 10000
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests/second with bursts of up to `burst`."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        # Tokens earned so far are banked at the old rate before the new one applies
+        with self.lock:
+            now = max(time.monotonic(), self.updated)
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.rate, self.updated = rate, now
+
+    def pause(self, seconds):
+        # A 429 slows every caller to that host down, not just the one that saw it
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens, self.updated = 0, self.paused_until
+
+    def acquire(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    time.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+class ClientMetrics:
+    """Per-host request counters: latency, bytes, status codes, retries and transport errors."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {"requests": 0, "bytes": 0, "retries": 0, "errors": 0, "statuses": {},
+                                "latency": deque(maxlen=LATENCY_SAMPLES)}
+        return self.hosts[host]
+
+    def record(self, host, status, latency, nbytes=0):
+        with self.lock:
+            h = self._host(host)
+            h["requests"] += 1
+            h["bytes"] += nbytes
+            h["statuses"][str(status)] = h["statuses"].get(str(status), 0) + 1
+            h["latency"].append(latency)
+
+    def add_bytes(self, host, nbytes):
+        with self.lock: self._host(host)["bytes"] += nbytes
+
+    def retry(self, host):
+        with self.lock: self._host(host)["retries"] += 1
+
+    def error(self, host, latency):
+        with self.lock:
+            h = self._host(host)
+            h["requests"] += 1
+            h["errors"] += 1
+            h["latency"].append(latency)
+
+    def total_retries(self):
+        with self.lock: return sum(h["retries"] for h in self.hosts.values())
+
+    def snapshot(self):
+        def summarize(h):
+            lat = sorted(h["latency"])
+            pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+            return {"requests": h["requests"], "bytes": h["bytes"], "retries": h["retries"], "errors": h["errors"],
+                    "statuses": dict(h["statuses"]), "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)}}
+        with self.lock:
+            return {"updated": datetime.now().isoformat(timespec='seconds'),
+                    "hosts": {host: summarize(h) for host, h in self.hosts.items()}}
+
+    def summary(self):
+        lines = []
+        for host, h in self.snapshot()["hosts"].items():
+            lat = h["latency_ms"]
+            lines.append(f"{host}: {h['requests']} requests, {h['bytes'] / 1e6:.1f} MB, {h['retries']} retries, {h['errors']} errors, "
+                         f"latency p50 {lat['p50']} ms / p95 {lat['p95']} ms, statuses {h['statuses']}")
+        return "\n".join(lines) or "No requests made."
+
+    def save(self, path=METRICS_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+# One set of counters per process, shared by every client, so a snapshot covers the whole run
+METRICS = ClientMetrics()
+
+def load_metrics_snapshot(path=METRICS_FILE):
+    if not os.path.exists(path): return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def retry_after(res):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), else None."""
+    value = res.headers.get('Retry-After') if res is not None else None
+    if not value: return None
+    try: return max(0.0, float(value))
+    except ValueError: pass
+    try: return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError): return None
+
+def is_transient(status):
+    """True for failures worth asking again later: no response at all (None), a 429 or any 5xx."""
+    return status is None or status == 429 or status >= 500
+
+def backoff_delay(attempt, res=None):
+    delay = retry_after(res)
+    if delay is None: delay = BACKOFF_BASE * 2 ** attempt + random.uniform(0, 1)
+    return min(delay, BACKOFF_CAP)
+
+class HttpClient:
+    """Pooled keep-alive session with per-host rate limiting, one retry/backoff policy and metrics.
+
+    get() is thread-safe: it waits for the host's token bucket, retries 429s and 5xx/connection
+    errors up to max_retries times (honouring Retry-After, otherwise exponential backoff; a 429
+    also pauses that host for everyone), and returns the final response, whatever its status.
+    A transport error that survives every retry is re-raised.
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, pool_size=DEFAULT_CONCURRENCY, headers=HEADERS,
+                 timeout=10, max_retries=MAX_RETRIES, host_rates=None, metrics=None):
+        self.rate, self.burst = rate, burst
+        self.host_rates = host_rates or {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.metrics = metrics or METRICS
+        self.limiters = {}
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers)
+
+    def limiter(self, host):
+        with self.lock:
+            if host not in self.limiters: self.limiters[host] = RateLimiter(self.host_rates.get(host, self.rate), self.burst)
+            return self.limiters[host]
+
+    def get(self, url, headers=None, cookies=None, timeout=None, stream=False):
+        host = urlsplit(url).netloc
+        limiter = self.limiter(host)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            started = time.monotonic()
+            try:
+                res = self.session.get(url, headers=headers, cookies=cookies, timeout=timeout or self.timeout, stream=stream)
+            except requests.RequestException:
+                self.metrics.error(host, time.monotonic() - started)
+                if attempt >= self.max_retries: raise
+                self.metrics.retry(host)
+                time.sleep(backoff_delay(attempt))
+                continue
+            # Streamed bodies are counted by the caller as they are read
+            self.metrics.record(host, res.status_code, time.monotonic() - started, 0 if stream else len(res.content))
+            if res.status_code not in RETRY_STATUSES: return res
+            delay = backoff_delay(attempt, res)
+            if res.status_code == 429: limiter.pause(delay) # Even on the last attempt, so the next caller waits too
+            if attempt >= self.max_retries: return res
+            self.metrics.retry(host)
+            res.close()
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+if __name__ == "__main__":
+    # Prints the last saved metrics snapshot: python screenerscraper_http.py [snapshot.json]
+    snapshot = load_metrics_snapshot(sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE)
+    if not snapshot: sys.exit("No metrics snapshot yet.")
+    print(f"HTTP metrics as of {snapshot['updated']}:")
+    print(json.dumps(snapshot["hosts"], indent=4))
@@ -0,0 +1,91 @@
+import os
+import time
+import sqlite3
+
+JOBS_FILE = ".scrape_jobs.sqlite"
+MAX_ATTEMPTS = 4
+RETRY_BASE, RETRY_CAP = 30.0, 600.0
+
+class JobStore:
+    """Persistent per-item state for one scrape job, stored in a SQLite file beside the job's output.
+
+    Items are kept in submission order with a status (pending / done / failed / gone), an attempt
+    count, the earliest time a failed item may be retried, and a short text result. A gone item
+    failed permanently (e.g. a 404) and is never retried. Every update is
+    committed straight away, so a crash or Ctrl-C resumes exactly where it stopped.
+    """
+    def __init__(self, folder, job, max_attempts=MAX_ATTEMPTS, retry_base=RETRY_BASE, db_path=None):
+        self.job = job
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.conn = sqlite3.connect(db_path or os.path.join(folder, JOBS_FILE))
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS items (
+            job TEXT, item TEXT, seq INTEGER, data TEXT, status TEXT, attempts INTEGER,
+            next_attempt REAL, result TEXT, PRIMARY KEY (job, item))""")
+
+    def exists(self):
+        return self.conn.execute("SELECT 1 FROM items WHERE job = ? LIMIT 1", (self.job,)).fetchone() is not None
+
+    def add(self, items):
+        """Queues (item, data) pairs in order; items already known to the job keep their state."""
+        start = self.conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM items WHERE job = ?", (self.job,)).fetchone()[0]
+        self.conn.executemany("INSERT OR IGNORE INTO items VALUES (?, ?, ?, ?, 'pending', 0, 0, NULL)",
+                              [(self.job, item, start + i, data) for i, (item, data) in enumerate(items)])
+        self.conn.commit()
+
+    def due(self):
+        """(item, data) pairs that still need work and whose retry backoff has expired, in submission order."""
+        return self.conn.execute(
+            "SELECT item, data FROM items WHERE job = ? AND status IN ('pending', 'failed') AND attempts < ? AND next_attempt <= ? ORDER BY seq",
+            (self.job, self.max_attempts, time.time())).fetchall()
+
+    def next_retry(self):
+        """Seconds until the next failed item may be retried, or None if nothing is left to retry."""
+        row = self.conn.execute(
+            "SELECT MIN(next_attempt) FROM items WHERE job = ? AND status IN ('pending', 'failed') AND attempts < ?",
+            (self.job, self.max_attempts)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def done(self, item, result=None):
+        self.conn.execute("UPDATE items SET status = 'done', attempts = attempts + 1, result = ? WHERE job = ? AND item = ?",
+                          (result, self.job, item))
+        self.conn.commit()
+
+    def failed(self, item, error=None, transient=True):
+        # Exponential backoff per item: the rest of the queue keeps moving while this one waits
+        attempts = self.conn.execute("SELECT attempts FROM items WHERE job = ? AND item = ?", (self.job, item)).fetchone()[0] + 1
+        if not transient:
+            # Asking again will get the same answer, so the item is settled without using up the retry budget
+            self.conn.execute("UPDATE items SET status = 'gone', attempts = ?, result = ? WHERE job = ? AND item = ?",
+                              (attempts, error, self.job, item))
+            self.conn.commit()
+            return
+        delay = min(self.retry_base * 2 ** (attempts - 1), RETRY_CAP)
+        self.conn.execute("UPDATE items SET status = 'failed', attempts = ?, next_attempt = ?, result = ? WHERE job = ? AND item = ?",
+                          (attempts, time.time() + delay, error, self.job, item))
+        self.conn.commit()
+
+    def results(self):
+        """(item, data, status, result) for every item, in submission order."""
+        return self.conn.execute("SELECT item, data, status, result FROM items WHERE job = ? ORDER BY seq", (self.job,)).fetchall()
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM items WHERE job = ? GROUP BY status", (self.job,)).fetchall())
+
+    def wait_for_retry(self):
+        """Sleeps until the next backed-off item is due. Returns False once nothing is left to retry."""
+        delay = self.next_retry()
+        if delay is None: return False
+        if delay > 0:
+            print(f"Retrying {self.counts().get('failed', 0)} failed item(s) in {delay:.1f}s...")
+            time.sleep(delay)
+        return True
+
+    def clear(self):
+        """Forgets a finished job so the next run starts fresh."""
+        self.conn.execute("DELETE FROM items WHERE job = ?", (self.job,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,103 @@
+import re
+import sys
+import time
+import random
+
+# Cell / label cleaning shared by the parsers. There are two cell outputs on purpose: clean_text()
+# keeps the page text canonical for parse_html and the CSV exports, parse_cell() types it
+# for the extractor and the columnar / record paths. Both clean a cell the same way.
+
+# '+' marks expandable rows ('Sales +'), ',' is the thousands separator; both are dropped everywhere
+_STRIP = str.maketrans('', '', '+,')
+NAN = float('nan')
+
+def clean_label(text):
+    """Row / section / header label: drops '+' and ',' and collapses whitespace."""
+    return ' '.join(text.translate(_STRIP).split())
+
+def _percent(clean):
+    # '12.5%' -> 0.125; None if the part before '%' is not a number
+    try: return float(clean[:-1]) / 100
+    except ValueError: return None
+
+def clean_text(text):
+    """Cell -> canonical text: percentages become decimal strings ('12.5%' -> '0.125'), '%' alone becomes ''."""
+    clean = ' '.join(text.translate(_STRIP).split())
+    if clean.endswith('%'):
+        if len(clean) == 1: return ""
+        num = _percent(clean)
+        if num is not None: return f"{num:.4f}".rstrip('0').rstrip('.')
+    return clean
+
+def parse_cell(text, blank=NAN):
+    """Cell -> typed value: float for numbers, percentages as decimals, `blank` for empty cells, text otherwise.
+
+    Plain numbers, with or without thousands separators, are settled by one translate() and one
+    float() (which ignores the surrounding whitespace), before any other check. '%' and text cells
+    fail that float() first and then pay for the whitespace clean-up, so they cost about what the
+    old helper did.
+    """
+    if not text: return blank
+    clean = text.translate(_STRIP)
+    try: return float(clean)
+    except ValueError: pass
+    clean = ' '.join(clean.split())
+    if not clean or clean == '%': return blank
+    if clean.endswith('%'):
+        num = _percent(clean)
+        return clean if num is None else round(num, 4)
+    return clean
+
+# --- Micro-benchmark: python screenerscraper_normalize.py [cells] ---
+
+SAMPLE_CELLS = ["1,234", "\n                  56.7\n                ", "12%", "-3.4%", "", "%", "0", "12,34,567.89",
+                "Mar 2024", "Sales +", "TTM", "842", "-1,019", " 18.25 %", "Net Profit", "0.5"]
+
+def _legacy_clean_text(text):
+    clean = text.replace('+', '').replace(',', '').strip()
+    clean = re.sub(r'\s+', ' ', clean)
+    if clean.endswith('%') and len(clean) > 1:
+        try: return f"{float(clean[:-1]) / 100:.4f}".rstrip('0').rstrip('.')
+        except ValueError: return clean
+    elif clean == '%': return ""
+    return clean
+
+def _legacy_clean_value(text):
+    if not text: return ""
+    clean = text.replace(',', '').strip()
+    clean = re.sub(r'\s+', ' ', clean)
+    if clean.endswith('%') and len(clean) > 1:
+        try: return round(float(clean[:-1]) / 100, 4)
+        except ValueError: return clean
+    elif clean == '%': return ""
+    try: return float(clean)
+    except ValueError: return clean
+
+def benchmark(n=1_000_000, seed=0, repeat=3):
+    """Times the old per-cell helpers against this module over `n` sample cells and checks they agree.
+
+    Passes are interleaved and the best of `repeat` is kept, so a busy machine skews every function alike.
+    parse_cell is timed twice, over the mixed sample and over its plain-number cells alone.
+    """
+    cells = random.Random(seed).choices(SAMPLE_CELLS, k=n)
+    numbers = random.Random(seed).choices([c for c in SAMPLE_CELLS if '%' not in c and isinstance(_legacy_clean_value(c), float)], k=n)
+    for cell in SAMPLE_CELLS:
+        assert clean_text(cell) == _legacy_clean_text(cell), cell
+        assert parse_cell(cell, blank="") == _legacy_clean_value(cell) or '+' in cell, cell
+
+    results = {}
+    for _ in range(repeat):
+        for name, fn, sample in (("clean_text (legacy)", _legacy_clean_text, cells), ("clean_text", clean_text, cells),
+                                 ("clean_value (legacy)", _legacy_clean_value, cells), ("parse_cell", parse_cell, cells),
+                                 ("numbers (legacy)", _legacy_clean_value, numbers), ("numbers", parse_cell, numbers)):
+            started = time.perf_counter()
+            for cell in sample: fn(cell)
+            results[name] = min(results.get(name, float('inf')), time.perf_counter() - started)
+    for name, elapsed in results.items(): print(f"{name:<22}{elapsed:7.3f}s  {elapsed / n * 1e9:6.0f} ns/cell")
+    print(f"Speedup: clean_text x{results['clean_text (legacy)'] / results['clean_text']:.2f}, "
+          f"parse_cell x{results['clean_value (legacy)'] / results['parse_cell']:.2f} "
+          f"(plain numbers x{results['numbers (legacy)'] / results['numbers']:.2f})")
+    return results
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,70 @@
+import os
+import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+ERROR_LOG = "screener_scraper_errors.log"
+logger = logging.getLogger("screenerscraper")
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def _ensure_error_log():
+    """Routes per-file failures to screener_scraper_errors.log unless the caller already configured logging."""
+    if logger.handlers or logging.getLogger().handlers: return
+    handler = logging.FileHandler(ERROR_LOG, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.ERROR)
+
+def _safe_call(parse_fn, filepath):
+    # Exceptions are returned as text so one malformed page never kills the pool
+    try: return parse_fn(filepath), None
+    except Exception as e: return None, str(e)
+
+def iter_parsed(files, parse_fn, workers=None, cache=None, live_files=None):
+    """Yields (filepath, result) in input order. Failed files are logged and yield None.
+
+    parse_fn must be a module-level function so it can be pickled to the worker processes.
+    workers=1 keeps everything in-process (handy for debugging). With a ParseCache, only
+    new or modified pages are handed to the workers; the rest are loaded from disk and,
+    once every file has been yielded, entries for pages outside `live_files` (default:
+    `files`) are evicted.
+    """
+    _ensure_error_log()
+    workers = workers or default_workers()
+    call = partial(_safe_call, parse_fn)
+
+    fresh, stats, misses = set(), {}, files
+    if cache:
+        misses = []
+        for fp in files:
+            st = os.stat(fp)
+            if cache.is_fresh(fp, st): fresh.add(fp)
+            else:
+                stats[fp] = st
+                misses.append(fp)
+
+    executor = None
+    if workers <= 1 or len(misses) <= 1:
+        results = map(call, misses)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(misses) // (workers * 16))
+        results = executor.map(call, misses, chunksize=chunksize)
+
+    try:
+        for fp in files:
+            if fp in fresh:
+                yield fp, cache.load(fp)
+                continue
+            result, error = next(results)
+            if error is not None:
+                logger.error(f"Failed {os.path.basename(fp)}: {error}")
+            elif cache:
+                cache.put(fp, stats[fp], result)
+            yield fp, result
+        if cache: cache.prune(files if live_files is None else live_files)
+    finally:
+        if cache: cache.commit()
+        if executor: executor.shutdown(cancel_futures=True)
@@ -0,0 +1,266 @@
+import io
+import sys
+import pickle
+import tempfile
+import numpy as np
+from screenerscraper_columnar import to_float
+
+HEADER_FIELDS = ("Broad Sector", "Sector", "Broad Industry", "Industry", "Company Name", "BSE Code", "NSE Symbol")
+_HEADER_ATTRS = ("broad_sector", "sector", "broad_industry", "industry", "company_name", "bse_code", "nse_symbol")
+_ATTR_OF = dict(zip(HEADER_FIELDS, _HEADER_ATTRS))
+
+# Row / column label tuples (with their index) shared by every block that has the same layout,
+# so thousands of companies hold one copy of 'Sales', 'Mar 2024', ... instead of one each.
+# Both tables are process-wide and append-only: nothing is ever evicted. RecordSpill recognises a
+# shared tuple by its id(), which is only sound because _LAYOUTS keeps every such tuple alive, so
+# no id in _LAYOUT_IDS can be reused by another object. Anything that prunes _LAYOUTS must prune
+# _LAYOUT_IDS with it and must not run while a RecordSpill is being written.
+_LAYOUTS = {}
+_LAYOUT_IDS = set()
+
+def _intern(label):
+    return sys.intern(label) if type(label) is str else label
+
+def _layout(labels):
+    labels = tuple(_intern(l) for l in labels)
+    hit = _LAYOUTS.get(labels)
+    if hit is None:
+        hit = _LAYOUTS[labels] = (labels, {l: i for i, l in enumerate(labels)})
+        _LAYOUT_IDS.add(id(labels))
+    return hit
+
+def format_value(value):
+    """Float -> the shortest text that reads back as it ('1234', '0.125')."""
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class CompanyHeader:
+    """The seven classification / identity fields; also readable as header['Company Name']."""
+    __slots__ = _HEADER_ATTRS
+
+    def __init__(self, values):
+        for attr, value in zip(_HEADER_ATTRS, values): setattr(self, attr, _intern(value))
+
+    @classmethod
+    def from_dict(cls, static):
+        return cls([static[f] for f in HEADER_FIELDS])
+
+    def __getitem__(self, field):
+        return getattr(self, _ATTR_OF[field])
+
+    def as_list(self):
+        return [getattr(self, attr) for attr in _HEADER_ATTRS]
+
+    def to_dict(self):
+        return dict(zip(HEADER_FIELDS, self.as_list()))
+
+    def __reduce__(self):
+        # The classification is a shared tuple (few distinct ones across a corpus); re-interned when unpickled
+        values = self.as_list()
+        return (_load_header, (_layout(values[:4])[0], values[4:]))
+
+class SectionBlock:
+    """One table: a float64 (metrics x periods) array, NaN where the page had no cell.
+
+    Cells the float cannot reproduce exactly (blanks, text, '12.50') keep their text in a small
+    side dict keyed by row * len(periods) + column. Text blocks (from parse_html / parse_xlsx) hand cells back as text, typed blocks
+    (from the extractor) as floats.
+    """
+    __slots__ = ("metrics", "periods", "values", "text", "typed", "_metric_index")
+
+    def __init__(self, metrics, periods, values, text=None, typed=False):
+        self.metrics, self._metric_index = _layout(metrics)
+        self.periods = _layout(periods)[0]
+        self.values = values
+        self.text = text or {}
+        self.typed = typed
+
+    def __reduce__(self):
+        # Raw float bytes: ndarray's own pickle costs more than a small table's data
+        return (_load_block, (self.metrics, self.periods, self.values.tobytes(), self.text or None, self.typed))
+
+    @classmethod
+    def from_rows(cls, rows, typed=False):
+        """rows: (metric, {period: cell}) pairs in page order; cells are text, or floats/text when typed."""
+        columns = {}
+        for _, cells in rows:
+            for p in cells: columns.setdefault(p, len(columns))
+        width = len(columns)
+        values = np.full((len(rows), width), np.nan)
+        text = {}
+        for i, (_, cells) in enumerate(rows):
+            for p, cell in cells.items():
+                j = columns[p]
+                if type(cell) is float: num = cell
+                else: num = to_float(cell)
+                if num is None or num != num or (type(cell) is not float and format_value(num) != cell):
+                    text[i * width + j] = cell if type(cell) is str else repr(cell)
+                else: values[i, j] = num
+        return cls([m for m, _ in rows], list(columns), values, text, typed)
+
+    def __len__(self):
+        return len(self.metrics)
+
+    def row(self, i):
+        """{period: cell} for row i, only the periods the page had."""
+        out = {}
+        base = i * len(self.periods)
+        for j, (p, v) in enumerate(zip(self.periods, self.values[i].tolist())):
+            t = self.text.get(base + j) if self.text else None
+            if t is not None: out[p] = t
+            elif v == v: out[p] = v if self.typed else format_value(v)
+        return out
+
+    def get(self, metric, default=None):
+        i = self._metric_index.get(metric)
+        return default if i is None else self.row(i)
+
+    def select(self, metric, columns):
+        """{column: cell} for the periods of `metric` listed in `columns` ({period: column}); None if the metric is missing.
+
+        Only the selected cells are formatted, so an export reading a few periods skips the rest.
+        """
+        i = self._metric_index.get(metric)
+        if i is None: return None
+        out = {}
+        base = i * len(self.periods)
+        values = None
+        for j, p in enumerate(self.periods):
+            col = columns.get(p)
+            if col is None: continue
+            t = self.text.get(base + j) if self.text else None
+            if t is not None:
+                out[col] = t
+                continue
+            if values is None: values = self.values[i].tolist()
+            v = values[j]
+            if v == v: out[col] = v if self.typed else format_value(v)
+        return out
+
+    def items(self):
+        for i, metric in enumerate(self.metrics): yield metric, self.row(i)
+
+    def cells(self):
+        """(metric, period, number or None, cell) for every cell the page had."""
+        for i, metric in enumerate(self.metrics):
+            for p, cell in self.row(i).items():
+                yield metric, p, cell if type(cell) is float else to_float(cell), cell
+
+def _load_header(classification, identity):
+    return CompanyHeader(list(classification) + identity)
+
+def _load_block(metrics, periods, raw, text, typed):
+    return SectionBlock(metrics, periods, np.frombuffer(raw).reshape(len(metrics), len(periods)), text, typed)
+
+def _load_record(header, names, blocks):
+    return CompanyRecord(header, list(zip(names, blocks)))
+
+class CompanyRecord:
+    """A parsed company: a CompanyHeader and its (section name, SectionBlock) tables in page order."""
+    __slots__ = ("header", "sections")
+
+    def __init__(self, header, sections):
+        self.header = header
+        self.sections = sections
+
+    @classmethod
+    def from_dict(cls, data, typed=False):
+        """{'static': {...}, 'financials': {section: {metric: {period: cell}}}} -> CompanyRecord."""
+        return cls(CompanyHeader.from_dict(data['static']),
+                   [(_intern(name), SectionBlock.from_rows(list(metrics.items()), typed)) for name, metrics in data['financials'].items()])
+
+    def __reduce__(self):
+        # Section names travel as one shared tuple, like the row / column labels
+        return (_load_record, (self.header, _layout([name for name, _ in self.sections])[0], [block for _, block in self.sections]))
+
+    def section(self, name):
+        for section_name, block in self.sections:
+            if section_name == name: return block
+        return None
+
+    def to_dict(self):
+        return {'static': self.header.to_dict(), 'financials': {name: dict(block.items()) for name, block in self.sections}}
+
+    def __eq__(self, other):
+        return isinstance(other, CompanyRecord) and self.to_dict() == other.to_dict()
+
+class RecordSpill:
+    """Append-only temp file of CompanyRecords, read back in write order (the extractor's second pass).
+
+    Float tables go out as raw bytes and every shared label tuple (row / column labels, section
+    names, classification) is written once per file, then referenced by number. A company costs
+    about its numbers, its identity fields and any text cells.
+    """
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.refs = {} # id(shared tuple) -> number, writer side
+
+    def _persistent_id(self, obj, new):
+        if type(obj) is not tuple or id(obj) not in _LAYOUT_IDS: return None
+        ref = self.refs.get(id(obj))
+        if ref is None:
+            ref = self.refs[id(obj)] = len(self.refs)
+            new.append(obj)
+        return ref
+
+    def write(self, record):
+        new, buf = [], io.BytesIO()
+        pickler = pickle.Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: self._persistent_id(obj, new)
+        pickler.dump(record)
+        # Tuples first seen in this record go just ahead of it, so the reader has them when they are referenced
+        pickle.dump(new, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(buf.getbuffer())
+
+    def __iter__(self):
+        self.file.seek(0)
+        shared = []
+        while True:
+            try: shared.extend(pickle.load(self.file))
+            except EOFError: return
+            unpickler = pickle.Unpickler(self.file)
+            unpickler.persistent_load = shared.__getitem__
+            yield unpickler.load()
+
+    def size(self):
+        return self.file.seek(0, io.SEEK_END)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def memory_report(html_dir, limit=500):
+    """Heap held by `limit` parsed pages as nested dicts vs CompanyRecords, plus their pickled / spilled size.
+
+    The pages are parsed before anything is measured, so the CompanyRecord line re-uses label
+    layouts that are already interned: it counts what each further company costs, not the one-off
+    cost of the shared labels.
+    """
+    import tracemalloc
+    from screenerscraper import parse_html
+    from screenerscraper_store import list_html_files
+
+    files = list_html_files(html_dir)[:limit]
+    records = [parse_html(fp) for fp in files]
+    for name, build in (("nested dicts", lambda: [r.to_dict() for r in records]),
+                        ("CompanyRecord", lambda: [pickle.loads(pickle.dumps(r)) for r in records])):
+        tracemalloc.start()
+        kept = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pickled = sum(len(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL)) for r in kept)
+        print(f"{name:<14}{size / len(files) / 1024:8.1f} KiB/company in memory, {pickled / len(files) / 1024:6.1f} KiB/company pickled")
+    with RecordSpill() as spill:
+        for r in records: spill.write(r)
+        print(f"{'RecordSpill':<14}{spill.size() / len(files) / 1024:39.1f} KiB/company spilled")
+
+if __name__ == "__main__":
+    # python screenerscraper_record.py <html_dir> [pages]
+    # Run from the imported module: parse_html interns its layouts there, and a RecordSpill from
+    # this __main__ copy would check a separate, empty _LAYOUT_IDS and share nothing
+    from screenerscraper_record import memory_report
+    memory_report(sys.argv[1] if len(sys.argv) > 1 else "screenerhtml", int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,109 @@
+import os
+import re
+import csv
+import json
+import zlib
+from screenerscraper_store import page_stem
+from screenerscraper_columnar import ColumnarWriter
+
+SHARD_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d+)\s*$')
+
+def parse_shard(spec):
+    """'i/N' (0-based, e.g. '0/4') -> (i, N); None/'' -> None. Tuples pass through."""
+    if not spec: return None
+    if isinstance(spec, (tuple, list)): index, count = spec
+    else:
+        m = SHARD_RE.match(str(spec))
+        if not m: raise ValueError(f"Shard must look like 'i/N' (e.g. 0/4), got '{spec}'.")
+        index, count = int(m.group(1)), int(m.group(2))
+    if count < 1 or not 0 <= index < count: raise ValueError(f"Shard index must be between 0 and {count - 1}, got {index}/{count}.")
+    return index, count
+
+def shard_of(filepath, count):
+    # crc32 of the page name, not hash(): the same page lands in the same shard on every machine and Python run
+    return zlib.crc32(page_stem(filepath).encode('utf-8')) % count
+
+def select_shard(files, shard):
+    if not shard: return files
+    index, count = shard
+    return [fp for fp in files if shard_of(fp, count) == index]
+
+def shard_name(stem, shard, ext):
+    """screenerscraped.shard-0-of-4.csv: no timestamp, so shards started on different days still merge."""
+    return f"{stem}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+def find_shards(folder, stem, ext, count):
+    """Paths of all `count` partial outputs, in shard order. Raises if any shard has not finished."""
+    parts = [os.path.join(folder, shard_name(stem, (i, count), ext)) for i in range(count)]
+    missing = [i for i, p in enumerate(parts) if not os.path.exists(p)]
+    if missing: raise FileNotFoundError(f"Missing {stem} output for shard(s) {', '.join(map(str, missing))} of {count} in '{folder}'.")
+    return parts
+
+def write_summary(path, summary):
+    # Written last, next to the partial output: its presence means the shard completed
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4)
+
+def merge_summaries(paths):
+    """Adds up the numeric fields (and dicts of counters, such as the audit tracker) of every shard summary."""
+    total = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for key, value in json.load(f).items():
+                if isinstance(value, dict):
+                    bucket = total.setdefault(key, {})
+                    for k, v in value.items(): bucket[k] = bucket.get(k, 0) + v
+                elif isinstance(value, (int, float)): total[key] = total.get(key, 0) + value
+    return total
+
+def _unified_columns(headers, fixed, order_columns):
+    # Union of every shard's period columns; first-seen order unless the caller sorts them
+    columns = {}
+    for header in headers:
+        for col in header:
+            if col not in fixed: columns.setdefault(col, None)
+    return order_columns(list(columns)) if order_columns else list(columns)
+
+def merge_csv(parts, out_file, fixed, order_columns=None):
+    """Concatenates shard CSVs under one header; periods a shard never saw are left blank. Returns the row count."""
+    headers = []
+    for part in parts:
+        with open(part, 'r', newline='', encoding='utf-8') as f: headers.append(next(csv.reader(f), []))
+    fieldnames = list(fixed) + _unified_columns(headers, set(fixed), order_columns)
+
+    rows = 0
+    with open(out_file, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=fieldnames)
+        writer.writeheader()
+        for part in parts:
+            with open(part, 'r', newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    writer.writerow(row)
+                    rows += 1
+    return rows
+
+def _columnar_reader(path, fmt):
+    """(column names, iterator of record batches) for a Parquet / Arrow IPC file."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        return pf.schema_arrow.names, pf.iter_batches()
+    import pyarrow as pa
+    reader = pa.ipc.open_file(path)
+    return reader.schema.names, (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+def merge_columnar(parts, out_file, fixed, fmt, order_columns=None):
+    """merge_csv for Parquet / Arrow IPC shards: streams batches into one ColumnarWriter under the unified columns."""
+    headers = [_columnar_reader(part, fmt)[0] for part in parts]
+    columns = _unified_columns(headers, set(fixed), order_columns)
+    writer = ColumnarWriter(out_file, list(fixed), columns, fmt)
+    rows = 0
+    try:
+        for part in parts:
+            for batch in _columnar_reader(part, fmt)[1]:
+                for row in batch.to_pylist():
+                    writer.write_row([row[c] for c in fixed], [row.get(c) for c in columns])
+                    rows += 1
+    finally:
+        writer.close()
+    return rows
@@ -0,0 +1,85 @@
+import os
+import sys
+import gzip
+
+# Pages are stored either as plain NAME.html or gzip-compressed NAME.html.gz; every reader accepts both
+HTML_SUFFIX = ".html"
+GZIP_SUFFIX = ".html.gz"
+COMPRESS_ENV_VAR = "SCREENER_COMPRESS_HTML"
+
+def is_compressed():
+    """Whether newly fetched pages are written gzip-compressed ($SCREENER_COMPRESS_HTML=1)."""
+    return os.environ.get(COMPRESS_ENV_VAR, "0") == "1"
+
+def set_compressed(enabled):
+    os.environ[COMPRESS_ENV_VAR] = "1" if enabled else "0"
+
+def is_html_file(filename):
+    return filename.endswith(HTML_SUFFIX) or filename.endswith(GZIP_SUFFIX)
+
+def page_stem(filename):
+    """NAME for NAME.html / NAME.html.gz."""
+    filename = os.path.basename(filename)
+    for suffix in (GZIP_SUFFIX, HTML_SUFFIX):
+        if filename.endswith(suffix): return filename[:-len(suffix)]
+    return filename
+
+def page_path(folder, name, compress=None):
+    compress = is_compressed() if compress is None else compress
+    return os.path.join(folder, name + (GZIP_SUFFIX if compress else HTML_SUFFIX))
+
+def find_page(folder, name):
+    """Existing path for a page in either form (the newer one if both exist), else None."""
+    found = [p for p in (page_path(folder, name, True), page_path(folder, name, False)) if os.path.exists(p)]
+    return max(found, key=os.path.getmtime) if found else None
+
+def list_html_files(folder):
+    """Paths of every stored page in `folder`, one per page name even if both forms are present."""
+    files = [f for f in os.listdir(folder) if is_html_file(f)]
+    stems = [page_stem(f) for f in files]
+    if len(set(stems)) == len(stems): return [os.path.join(folder, f) for f in files]
+    seen, paths = set(), []
+    for stem in stems:
+        if stem not in seen:
+            seen.add(stem)
+            paths.append(find_page(folder, stem))
+    return paths
+
+def open_html(filepath):
+    """Text-mode handle on a stored page, decompressing .html.gz transparently."""
+    if filepath.endswith(GZIP_SUFFIX): return gzip.open(filepath, 'rt', encoding='utf-8')
+    return open(filepath, 'r', encoding='utf-8')
+
+def read_html(filepath):
+    with open_html(filepath) as f:
+        return f.read()
+
+def write_html(folder, name, text, compress=None):
+    """Saves a page as NAME.html or NAME.html.gz and removes the other form so readers never see two copies."""
+    path = page_path(folder, name, compress)
+    if path.endswith(GZIP_SUFFIX):
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(text.encode('utf-8'), compresslevel=6, mtime=0)) # mtime=0: same page, same bytes
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    other = page_path(folder, name, not path.endswith(GZIP_SUFFIX))
+    if os.path.exists(other): os.unlink(other)
+    return path
+
+def convert_folder(folder, compress=True):
+    """Rewrites every page in `folder` into the requested form. Returns (pages converted, bytes before, bytes after)."""
+    converted, before, after = 0, 0, 0
+    for fp in list_html_files(folder):
+        if fp.endswith(GZIP_SUFFIX) == compress: continue
+        before += os.path.getsize(fp)
+        after += os.path.getsize(write_html(folder, page_stem(fp), read_html(fp), compress))
+        converted += 1
+    return converted, before, after
+
+if __name__ == "__main__":
+    # python screenerscraper_store.py compress|decompress <html_dir>
+    if len(sys.argv) != 3 or sys.argv[1] not in ("compress", "decompress"):
+        sys.exit("Usage: python screenerscraper_store.py compress|decompress <html_dir>")
+    n, before, after = convert_folder(sys.argv[2], sys.argv[1] == "compress")
+    print(f":white_check_mark: {sys.argv[1].title()}ed {n} pages: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB.")
@@ -0,0 +1,91 @@
+import os
+import re
+from datetime import datetime
+from screenerscraper_record import CompanyRecord
+
+# Bump whenever parse_xlsx's output changes so cached records are rebuilt
+XLSX_VERSION = 2
+DATA_SHEET = "Data Sheet"
+
+# Data Sheet block headers -> the section names parse_html reports for the same tables
+XLSX_SECTIONS = {"PROFIT & LOSS": "Profit & Loss", "QUARTERS": "Quarterly Results",
+                 "BALANCE SHEET": "Balance Sheet", "CASH FLOW": "Cash Flows"}
+END_MARKERS = {"PRICE", "DERIVED"}
+
+# Data Sheet row labels -> the metric names on the HTML page. "Total" appears twice in the balance
+# sheet (liabilities, then assets), so those are keyed by occurrence.
+METRIC_ALIASES = {
+    "Profit & Loss": {"Net profit": "Net Profit"},
+    "Quarterly Results": {"Net profit": "Net Profit"},
+    "Balance Sheet": {"Equity Share Capital": "Equity Capital", "Net Block": "Fixed Assets",
+                      "Capital Work in Progress": "CWIP", ("Total", 1): "Total Liabilities", ("Total", 2): "Total Assets"},
+    "Cash Flows": {},
+}
+TOP_INFO = {"Current Price": "Current Price", "Market Capitalization": "Market Cap", "Face Value": "Face Value"}
+
+def list_xlsx_files(folder):
+    # ~$ files are Excel lock files; unfinished downloads end in .part and never match
+    return [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.xlsx') and not f.startswith('~$')]
+
+def format_number(value):
+    """Cell value -> the text parse_html would have read off the page (2 decimals, no trailing zeros)."""
+    if value is None or value == "": return ""
+    if isinstance(value, (int, float)):
+        text = f"{value:.2f}".rstrip('0').rstrip('.')
+        return "0" if text == "-0" else text
+    return str(value).replace(',', '').strip()
+
+def period_label(value):
+    """Report Date cell (datetime or text) -> 'Mar 2024', the period format parse_html uses."""
+    if isinstance(value, datetime): return value.strftime("%b %Y")
+    m = re.search(r'([A-Z][a-z]{2})\w*[\s-](\d{4})', str(value or ""))
+    return f"{m.group(1)} {m.group(2)}" if m else None
+
+def block_name(label):
+    return label.upper().rstrip(':').strip()
+
+def parse_xlsx(filepath):
+    """Reads a Screener Excel export's Data Sheet into the same CompanyRecord as parse_html.
+
+    The export carries no exchange links or sector classification: the company id in the file
+    name becomes the NSE Symbol (or the BSE Code when it is a 6-digit number) and the four
+    classification fields stay 'Unknown'. TTM columns and ratio tables are not in the export.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading Excel exports needs openpyxl. Install it with 'pip install openpyxl'.")
+    cid = os.path.basename(filepath)[:-len('.xlsx')]
+    data = {'static': {
+        'Company Name': 'Unknown', 'BSE Code': cid if re.fullmatch(r'\d{6}', cid) else 'N/A',
+        'NSE Symbol': 'N/A' if re.fullmatch(r'\d{6}', cid) else cid,
+        'Broad Sector': 'Unknown', 'Sector': 'Unknown', 'Broad Industry': 'Unknown', 'Industry': 'Unknown'
+    }, 'financials': {'Top Info': {}}}
+
+    # read_only streams rows straight from the sheet XML instead of building every cell object
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        section, periods, seen = None, {}, {}
+        for row in wb[DATA_SHEET].iter_rows(values_only=True):
+            if not row or row[0] is None: continue
+            label = str(row[0]).strip()
+            block = block_name(label)
+
+            if block in XLSX_SECTIONS:
+                section, periods, seen = XLSX_SECTIONS[block], {}, {}
+                data['financials'].setdefault(section, {})
+            elif block in END_MARKERS:
+                section = None
+            elif section is None:
+                if block == "COMPANY NAME" and len(row) > 1 and row[1]: data['static']['Company Name'] = str(row[1]).strip()
+                elif label in TOP_INFO and len(row) > 1: data['financials']['Top Info'][TOP_INFO[label]] = {"Static": format_number(row[1])}
+            elif label == "Report Date":
+                periods = {idx: p for idx, p in ((idx, period_label(v)) for idx, v in enumerate(row) if idx) if p}
+            elif periods:
+                seen[label] = seen.get(label, 0) + 1
+                aliases = METRIC_ALIASES[section]
+                metric = aliases.get((label, seen[label]), aliases.get(label, label))
+                data['financials'][section][metric] = {p: format_number(row[idx]) for idx, p in periods.items() if idx < len(row)}
+    finally:
+        wb.close()
+    return CompanyRecord.from_dict(data)
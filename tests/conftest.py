@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+
+# The backend modules import each other by bare name, the way the app and the extractor load them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "screenerscraper")):
+    if path not in sys.path: sys.path.insert(0, path)
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+class LocalSite:
+    """Local stand-in for the site, served from a background thread.
+
+    Every hit is logged as (path, monotonic time) before the reply. `respond(path, seen)` picks the
+    answer as (status, headers, body), where `seen` counts earlier hits on the same path; the default
+    echoes the path in a small HTML page. `latency` delays every reply.
+    """
+    def __init__(self):
+        self.hits, self.lock = [], threading.Lock()
+        self.latency = 0.0
+        self.respond = lambda path, seen: (200, {}, f"<html><h1>{path}</h1></html>".encode())
+        site = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    seen = sum(p == self.path for p, _ in site.hits)
+                    site.hits.append((self.path, time.monotonic()))
+                time.sleep(site.latency)
+                status, headers, body = site.respond(self.path, seen)
+                self.send_response(status)
+                for name, value in headers.items(): self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args): pass
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def paths(self):
+        return [p for p, _ in self.hits]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def local_site():
+    site = LocalSite()
+    yield site
+    site.close()
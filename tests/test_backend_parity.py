@@ -0,0 +1,35 @@
+import os
+import pytest
+from conftest import FIXTURES
+from screenerscraper_backend import available_backends, check_parity, set_backend, set_targeted, ENV_VAR, TARGETED_ENV_VAR
+from screenerscraper_store import list_html_files
+from screenerscraper import parse_html
+from screenerscraper_getmeta import scan_meta
+
+PAGES = list_html_files(os.path.join(FIXTURES, "html"))
+MODES = [(backend, targeted) for backend in available_backends() for targeted in (False, True)]
+
+@pytest.fixture(autouse=True)
+def restore_backend(monkeypatch):
+    # set_backend / set_targeted write the environment; monkeypatch puts it back after each test
+    monkeypatch.delenv(ENV_VAR, raising=False)
+    monkeypatch.delenv(TARGETED_ENV_VAR, raising=False)
+
+def parse_under(filepath, backend, targeted):
+    set_backend(backend)
+    set_targeted(targeted)
+    return parse_html(filepath).to_dict()
+
+def test_fixture_corpus_is_present():
+    assert len(PAGES) >= 3
+    assert len(MODES) >= 2, "lxml and html.parser should both be installed"
+
+@pytest.mark.parametrize("filepath", PAGES, ids=os.path.basename)
+def test_parse_html_identical_across_backends_and_modes(filepath):
+    reference = parse_under(filepath, *MODES[0])
+    assert reference['financials'], "fixture page parsed to nothing"
+    for backend, targeted in MODES[1:]:
+        assert parse_under(filepath, backend, targeted) == reference, f"{backend} targeted={targeted}"
+
+def test_check_parity_reports_no_mismatches():
+    assert check_parity(PAGES, [parse_html, scan_meta], available_backends()) == []
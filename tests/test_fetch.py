@@ -0,0 +1,69 @@
+import pytest
+from screenerscraper_fetch import fetch_urls
+from screenerscraper_http import HttpClient, ClientMetrics
+
+LATENCY = 0.1
+RETRY_AFTER = 0.2
+
+def throttle_sevens(path, seen):
+    # Pages ending in '7' are throttled once with a 429
+    if seen == 0 and path.endswith('7'): return 429, {'Retry-After': str(RETRY_AFTER)}, b""
+    return 200, {}, f"<html><h1>{path}</h1></html>".encode()
+
+@pytest.fixture
+def server(local_site):
+    local_site.latency, local_site.respond = LATENCY, throttle_sevens
+    return local_site
+
+def company_urls(site, n):
+    return [f"{site.url}/company/C{i}" for i in range(n)]
+
+def run(urls, concurrency, rate, burst):
+    results = []
+    client = HttpClient(rate=rate, burst=burst, pool_size=concurrency, metrics=ClientMetrics())
+    try:
+        stats = fetch_urls(urls, lambda i, u, res, err: results.append((i, u, res.status_code if res is not None else None, res.text if res is not None else err)),
+                           concurrency=concurrency, client=client)
+    finally:
+        client.close()
+    return stats, results, client.metrics
+
+def test_every_page_arrives_once_under_its_index(server):
+    urls = company_urls(server, 30)
+    stats, results, _ = run(urls, concurrency=8, rate=50.0, burst=8)
+    assert stats["ok"] == 30 and stats["failed"] == 0
+    assert sorted(i for i, *_ in results) == list(range(30))
+    for i, url, status, body in results:
+        assert url == urls[i] and status == 200 and f"/company/C{i}<" in body
+    # Slow responses overlap: well under the serial crawl time
+    assert stats["elapsed"] < len(urls) * LATENCY / 2
+
+def test_serial_run_keeps_url_order(server):
+    urls = company_urls(server, 12)
+    _, results, _ = run(urls, concurrency=1, rate=100.0, burst=1)
+    assert [i for i, *_ in results] == list(range(12))
+    # C7 is requested twice (429, then the retry) before C8 starts
+    assert server.paths() == [f"/company/C{i}" for i in range(8)] + ["/company/C7"] + [f"/company/C{i}" for i in range(8, 12)]
+
+def test_429s_are_retried_once_after_retry_after(server):
+    urls = company_urls(server, 30) # C7, C17 and C27 are throttled once
+    stats, results, metrics = run(urls, concurrency=8, rate=50.0, burst=8)
+    assert stats["retries"] == 3 and metrics.total_retries() == 3
+    assert all(status == 200 for _, _, status, _ in results)
+    host = next(iter(metrics.snapshot()["hosts"].values()))
+    assert host["statuses"] == {"429": 3, "200": 30} and host["requests"] == 33
+    for page in ("/company/C7", "/company/C17", "/company/C27"):
+        first, retry = [t for p, t in server.hits if p == page]
+        assert retry - first >= RETRY_AFTER + LATENCY - 0.05
+
+def test_request_rate_stays_under_the_limit(server):
+    rate, burst, n = 10.0, 2, 25
+    urls = [u for u in company_urls(server, n) if not u.endswith('7')] # Keep 429 pauses out of the pacing check
+    stats, _, _ = run(urls, concurrency=8, rate=rate, burst=burst)
+    starts = sorted(t for _, t in server.hits)
+    assert len(starts) == len(urls)
+    # Token bucket: any window of w seconds holds at most burst + rate * w requests (small slack for timer jitter)
+    for i in range(len(starts)):
+        for j in range(i + 1, len(starts)):
+            assert j - i + 1 <= burst + rate * (starts[j] - starts[i]) + 1, (i, j)
+    assert stats["elapsed"] >= (len(urls) - burst) / rate - 0.1
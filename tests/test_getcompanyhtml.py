@@ -0,0 +1,48 @@
+import os
+import pytest
+from screenerscraper_http import ClientMetrics
+from screenerscraper_jobs import JobStore
+from screenerscraper_getcompanyhtml import run_html_scraper
+
+@pytest.fixture
+def site(local_site):
+    return f"{local_site.url}/company"
+
+@pytest.fixture(autouse=True)
+def no_metrics_snapshot(monkeypatch):
+    # The scraper saves its HTTP metrics beside the backend scripts; keep test runs out of the repo
+    monkeypatch.setattr(ClientMetrics, "save", lambda self, path=None: None)
+
+def test_resumed_job_picks_up_links_added_to_the_file(tmp_path, site):
+    link_file, folder = tmp_path / "links.txt", tmp_path / "html"
+    old = [f"{site}/AAA/", f"{site}/BBB/"]
+    new = [f"{site}/CCC/", f"{site}/AAA/consolidated/"]
+
+    # An interrupted run: AAA saved, BBB still pending
+    os.makedirs(folder)
+    jobs = JobStore(str(folder), f"html:{os.path.abspath(link_file)}")
+    jobs.add([(old[0], "AAA"), (old[1], "BBB")])
+    jobs.done(old[0], "SUCCESS")
+    jobs.close()
+    (folder / "AAA.html").write_text("<html>saved earlier</html>")
+
+    link_file.write_text("\n".join(old + new) + "\n")
+    run_html_scraper(str(link_file), str(folder), '2', concurrency=2, rate=50.0)
+
+    assert (folder / "AAA.html").read_text() == "<html>saved earlier</html>" # Done before the interruption, not refetched
+    assert "/BBB/" in (folder / "BBB.html").read_text()
+    assert "/CCC/" in (folder / "CCC.html").read_text()
+    assert "/AAA/consolidated/" in (folder / "AAA_2.html").read_text() # Named around the job's own AAA
+    log = next(tmp_path.glob("screenerlinks-*.txt")).read_text()
+    for url in old + new: assert f"{url} - SUCCESS" in log
+
+def test_missing_page_is_requested_once(tmp_path, local_site, site):
+    local_site.respond = lambda path, seen: (404, {}, b"") if "/GONE/" in path else (200, {}, f"<html><h1>{path}</h1></html>".encode())
+    link_file, folder = tmp_path / "links.txt", tmp_path / "html"
+    link_file.write_text(f"{site}/AAA/\n{site}/GONE/\n")
+    run_html_scraper(str(link_file), str(folder), '2', concurrency=2, rate=50.0, retry_base=0.01)
+
+    assert local_site.paths().count("/company/GONE/") == 1 # A 404 is final, not backed off and asked again
+    assert [p.name for p in folder.glob("*.html")] == ["AAA.html"]
+    log = next(tmp_path.glob("screenerlinks-*.txt")).read_text()
+    assert f"{site}/GONE/ - FAILED" in log and f"{site}/AAA/ - SUCCESS" in log
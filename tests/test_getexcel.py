@@ -0,0 +1,58 @@
+import os
+import pytest
+import screenerscraper_getexcel as getexcel
+from screenerscraper_getexcel import AIMDWindow, run_excel_scraper, EXCEL_START_RATE, EXCEL_MAX_RATE, EXCEL_MAX_CONCURRENCY, MIN_RATE_FRACTION
+from screenerscraper_http import RateLimiter, ClientMetrics
+
+XLSX = b"PK\x03\x04" + b"\x00" * 4096
+
+def test_healthy_downloads_climb_from_the_old_pace_to_the_ceiling():
+    assert EXCEL_START_RATE * 60 == pytest.approx(4) # The old batch-and-pause downloader's average
+    limiter = RateLimiter(EXCEL_START_RATE)
+    window = AIMDWindow(EXCEL_MAX_CONCURRENCY, limiter, EXCEL_MAX_RATE)
+    rates = [limiter.rate]
+    for _ in range(100):
+        window.record(False)
+        rates.append(limiter.rate)
+    assert rates == sorted(rates) and limiter.rate == EXCEL_MAX_RATE > EXCEL_START_RATE
+    assert window.size == EXCEL_MAX_CONCURRENCY
+
+def test_window_drives_the_limiter_rate():
+    limiter = RateLimiter(1.0)
+    window = AIMDWindow(4, limiter)
+    for _ in range(1 + 2 + 3): window.record(False) # A full window of healthy responses per step
+    assert window.size == 4 and window.rate == limiter.rate == 1.0 # Never above the configured ceiling
+
+    window.record(True)
+    assert window.size == 2 and limiter.rate == 0.5
+    window.record(True)
+    assert window.size == 1 and limiter.rate == 0.25
+    for _ in range(10): window.record(True)
+    assert window.size == 1 and limiter.rate == MIN_RATE_FRACTION
+
+    # Additive increase: one healthy window adds 1/8 of the ceiling back
+    window.record(False)
+    assert window.size == 2 and limiter.rate == pytest.approx(MIN_RATE_FRACTION + 1 / 8)
+
+@pytest.fixture
+def excel_site(monkeypatch, local_site):
+    local_site.respond = lambda path, seen: (200, {}, XLSX)
+    monkeypatch.setattr(getexcel, "EXCEL_URL", f"{local_site.url}/excel/{{cid}}/")
+    monkeypatch.setattr(ClientMetrics, "save", lambda self, path=None: None)
+
+def test_write_errors_fail_one_company_and_leave_no_part_file(tmp_path, monkeypatch, excel_site, capsys):
+    link_file, folder = tmp_path / "links.txt", tmp_path / "excel"
+    link_file.write_text("".join(f"https://www.screener.in/company/C{i}/\n" for i in range(4)))
+    real_replace = os.replace
+    def replace(src, dst):
+        if dst.endswith("C2.xlsx"): raise OSError(28, "No space left on device")
+        return real_replace(src, dst)
+    monkeypatch.setattr(getexcel.os, "replace", replace)
+
+    run_excel_scraper(str(link_file), str(folder), "cookie", rate=100.0, retry_base=0.01)
+
+    assert sorted(f for f in os.listdir(folder) if not f.startswith('.')) == ["C0.xlsx", "C1.xlsx", "C3.xlsx"]
+    assert (folder / "C0.xlsx").read_bytes() == XLSX
+    out = capsys.readouterr().out
+    assert "Failed: C2 (OSError: [Errno 28] No space left on device)" in out
+    assert "Gave up on 1 companies: C2" in out
@@ -0,0 +1,60 @@
+import os
+import pandas as pd
+import pytest
+from conftest import FIXTURES
+from screenerscraper import run_export, FinancialSink, ColumnarSink
+import build_master_sheet as bms
+
+pytest.importorskip("pyarrow")
+
+ACTIVE_METRICS = [{"Section": s, "Metric": m, "Active": True} for s, m in [
+    ("Top Info", "Current Price"), ("Top Info", "Market Cap"), ("Top Info", "Book Value"),
+    ("Profit & Loss", "Net Profit"), ("Profit & Loss", "Operating Profit"), ("Quarterly Results", "Net Profit"),
+    ("Compounded Profit Growth", "3 Years"), ("Balance Sheet", "Reserves"),
+]]
+
+def manual_datasets(df_screen):
+    """DS1 + DS2 stand-in: the technicals only, so price and market cap must come from the screener export."""
+    keys = df_screen[['NSE Symbol', 'BSE Code']].drop_duplicates()
+    return keys.assign(**{'52W_High': "3000", '52W_Low': "2000", '2024_High': "2900", '2024_Low': "2100", '2024_Close': "2500"})
+
+@pytest.fixture(scope="module")
+def exports(tmp_path_factory):
+    out = tmp_path_factory.mktemp("exports")
+    sinks = [FinancialSink([2025, 2024], ["Mar", "Dec"], True, ACTIVE_METRICS)]
+    sinks += [ColumnarSink([2025, 2024], ["Mar", "Dec"], True, ACTIVE_METRICS, fmt) for fmt in ("parquet", "arrow")]
+    for sink in sinks: sink.out_file = str(out / os.path.basename(sink.out_file))
+    assert run_export(os.path.join(FIXTURES, "html"), sinks, None, workers=1, use_cache=False) == 3
+    return [sink.out_file for sink in sinks]
+
+def as_numbers(matrix):
+    # The CSV carries '125430', the columnar export 125430.0: compare cell values, not their Python types
+    return pd.DataFrame(matrix, columns=bms.COLUMNS).apply(lambda c: pd.to_numeric(c, errors='coerce')).astype(float)
+
+def test_static_values_fold_into_first_period(exports):
+    csv_path, parquet_path, _ = exports
+    df_csv, df_parquet = bms.load_screener(csv_path), bms.load_screener(parquet_path)
+    assert "Static" not in df_parquet.columns
+    assert list(df_parquet.columns) == list(df_csv.columns)
+    market_cap = df_parquet[df_parquet['Metric'] == "Market Cap"]
+    assert market_cap['TTM'].notna().all()
+
+@pytest.mark.parametrize("mode", ["formulas", "values"])
+def test_columnar_exports_build_the_csv_master_sheet(exports, mode):
+    csv_path, *columnar = exports
+    df_csv = bms.load_screener(csv_path)
+    expected, orphans = bms.build_matrix(df_csv, manual_datasets(df_csv), mode)
+    assert len(expected) == 3 and orphans.empty
+
+    # Every fixture page has a Market Cap; the bank page has no Current Price
+    numbers = as_numbers(expected)
+    assert numbers["Market_Cap"].notna().all() and numbers["Current_Price"].notna().sum() == 2
+    if mode == "values": assert numbers["Shares_Outstanding"].notna().sum() == 2
+
+    for path in columnar:
+        df = bms.load_screener(path)
+        matrix, _ = bms.build_matrix(df, manual_datasets(df), mode)
+        pd.testing.assert_frame_equal(as_numbers(matrix), numbers, obj=os.path.basename(path))
+        # Text results ('Negative Core', relevance tags, names) match cell for cell too
+        text = lambda m: pd.DataFrame(m, columns=bms.COLUMNS).map(lambda c: c if isinstance(c, str) else None)
+        pd.testing.assert_frame_equal(text(matrix), text(expected), obj=os.path.basename(path))
@@ -0,0 +1,54 @@
+import os
+import pickle
+import pytest
+from conftest import FIXTURES
+from screenerscraper_store import list_html_files
+from screenerscraper_record import CompanyRecord, RecordSpill
+from screenerscraper import parse_html
+from screener_extractor import parse_screener_file
+
+PAGES = list_html_files(os.path.join(FIXTURES, "html"))
+
+@pytest.fixture(scope="module", params=["parse_html", "extractor"])
+def records(request):
+    if request.param == "parse_html": return [parse_html(fp) for fp in PAGES]
+    return [parse_screener_file(fp)[0] for fp in PAGES]
+
+def spill_ratio(records):
+    many = records * 20
+    dicts = sum(len(pickle.dumps(r.to_dict(), protocol=pickle.HIGHEST_PROTOCOL)) for r in many)
+    with RecordSpill() as spill:
+        for record in many: spill.write(record)
+        return spill.size() / dicts
+
+def test_pickle_round_trip(records):
+    for record in records:
+        back = pickle.loads(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+        assert back == record and back.header.as_list() == record.header.as_list()
+        assert [name for name, _ in back.sections] == [name for name, _ in record.sections]
+
+def test_spill_replays_records_in_order(records):
+    with RecordSpill() as spill:
+        for record in records * 3: spill.write(record)
+        assert list(spill) == records * 3
+        assert list(spill) == records * 3 # Replayable
+
+def test_spill_is_smaller_than_nested_dict_pickles(records):
+    # Labels are written once per file; after the first company only numbers, identity and text cells remain
+    assert spill_ratio(records) < 0.9
+
+def test_typed_spill_is_mostly_numbers():
+    # The extractor's typed records: blanks are NaN in the float table, not text
+    assert spill_ratio([parse_screener_file(fp)[0] for fp in PAGES]) < 0.75
+
+def test_from_dict_keeps_text_cells():
+    data = {'static': {'Broad Sector': 'A', 'Sector': 'B', 'Broad Industry': 'C', 'Industry': 'D', 'Company Name': 'E', 'BSE Code': '1', 'NSE Symbol': 'N/A'},
+            'financials': {'Ratios': {'ROCE %': {'Mar 2024': '0.125', 'Mar 2025': '12.50', 'TTM': ''}, 'Raw PDF': {'Mar 2024': 'pdf'}}}}
+    record = CompanyRecord.from_dict(data)
+    assert record.to_dict() == data
+    assert record.section('Ratios').select('ROCE %', {'Mar 2025': 0, 'Mar 2024': 1}) == {0: '12.50', 1: '0.125'}
+
+def test_layout_ids_track_live_interned_tuples(records):
+    # RecordSpill matches shared tuples by id(); that holds only while every interned tuple stays alive
+    from screenerscraper_record import _LAYOUTS, _LAYOUT_IDS
+    assert _LAYOUT_IDS == {id(labels) for labels in _LAYOUTS}
@@ -0,0 +1,18 @@
+import pandas as pd
+import build_master_sheet as bms
+
+def layout(rows):
+    """Layout cells for a few companies: every column blank unless given."""
+    return pd.DataFrame([{col: row.get(col) for col in bms.COLUMNS} for row in rows], columns=bms.COLUMNS)
+
+def test_default_mode_writes_formulas_only():
+    assert bms.COMPUTE_MODE == "formulas"
+
+def test_market_weight_follows_excel_comparisons():
+    # IF(Market_Cap>50000, 1.0, IF(Market_Cap>5000, 0.9, 0.75)): text compares above any number, blank as 0
+    caps = ["N/A", 60000.0, 6000.0, 100.0, None]
+    cells = layout([{"Sector": "Chemicals", "TTM_EPS": 10.0, "5Yr_Median_PE": 20.0, "Market_Cap": cap,
+                     "Relevance_PE": "HIGH", "Relevance_PB": "LOW", "Relevance_EV": "LOW"} for cap in caps])
+    out = bms.compute_valuations(cells)
+    weights = [mw / sw for mw, sw in zip(out["Market_Weighted_FV"], out["Sector_Weighted_FV"])]
+    assert weights == [1.0, 1.0, 0.9, 0.75, 0.75]